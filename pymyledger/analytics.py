@@ -0,0 +1,167 @@
+import numpy as np
+
+from .model import Ledger, MonthKey, PackedLineItems
+
+
+STATIC = 0
+VARIABLE = 1
+
+# Row columns and their dtypes
+COLUMNS = {
+    "month_index": np.int32,
+    "name_id": np.int32,
+    "kind": np.int8,
+    "amount": np.float64,
+    "paid": np.bool_,
+}
+
+
+def _concatenate(chunks, dtype):
+    if not chunks:
+        return np.empty(0, dtype=dtype)
+    return np.concatenate(chunks).astype(dtype, copy=False)
+
+
+class LedgerFrame:  # pylint: disable=R0902
+    """Columnar projection of a Ledger for whole-history queries.
+
+    Every line item of every month becomes one row across parallel arrays
+    (month, item name id, kind, amount, paid). Rows are grouped by month in
+    ascending order, so ``month_index`` points into ``months``.
+    """
+
+    def __init__(self, months, month_index, name_id, kind, amount, paid, names):
+        # pylint: disable=R0913
+        self.months = months
+        self.month_index = month_index
+        self.name_id = name_id
+        self.kind = kind
+        self.amount = amount
+        self.paid = paid
+        self.names = names
+        self._name_ids = {n: i for i, n in enumerate(names)}
+
+    @classmethod
+    def from_ledger(cls, ledger: Ledger):
+        keys = ledger.sorted_months
+        ids_cache = {}
+        columns = {c: [] for c in COLUMNS}
+        for i, budget in enumerate(ledger.months[k] for k in keys):
+            for kind, items in ((STATIC, budget.static), (VARIABLE, budget.variable)):
+                n = len(items)
+                if not n:
+                    continue
+                ids, amounts, paid = cls._project(items, ledger, ids_cache)
+                columns["month_index"].append(np.full(n, i, dtype=np.int32))
+                columns["name_id"].append(ids)
+                columns["kind"].append(np.full(n, kind, dtype=np.int8))
+                columns["amount"].append(amounts)
+                columns["paid"].append(paid)
+        arrays = {c: _concatenate(v, COLUMNS[c]) for c, v in columns.items()}
+        months = np.fromiter((k.ordinal for k in keys), dtype=np.int64, count=len(keys))
+        return cls(months, names=list(ledger.names), **arrays)
+
+    @staticmethod
+    def _project(items, ledger, ids_cache):
+        if isinstance(items, PackedLineItems):
+            # Months carried forward share their name list, so map it once.
+            # The list is held with its ids so that, when a lazy ledger
+            # evicts the month, no other list can take over its id()
+            names = items.names()
+            cached = ids_cache.get(id(names))
+            if cached is not None and cached[0] is names:
+                ids = cached[1]
+            else:
+                ids = np.fromiter(
+                    (ledger.names.id_of(n) for n in names),
+                    dtype=np.int32,
+                    count=len(items),
+                )
+                ids_cache[id(names)] = (names, ids)
+            amounts = items.amounts()
+            amounts = np.frombuffer(amounts, dtype=amounts.typecode)
+            paid = np.frombuffer(items.paid_flags(), dtype=np.bool_)
+            return ids, amounts, paid
+        ids = np.array([ledger.names.id_of(i.name) for i in items], dtype=np.int32)
+        amounts = np.array([i.amount for i in items], dtype=np.float64)
+        paid = np.array([getattr(i, "paid", False) for i in items], dtype=np.bool_)
+        return ids, amounts, paid
+
+    @property
+    def month_keys(self):
+        return [MonthKey.from_ordinal(int(o)) for o in self.months]
+
+    @property
+    def years(self):
+        return np.unique(self.months // 12)
+
+    def _mask(self, kind):
+        if kind is None:
+            return slice(None)
+        return self.kind == kind
+
+    def _per_month(self, weights, kind=None):
+        mask = self._mask(kind)
+        return np.bincount(
+            self.month_index[mask], weights=weights[mask], minlength=len(self.months)
+        )
+
+    def totals_by_month(self, kind=None):
+        return self._per_month(self.amount, kind)
+
+    def assets_by_month(self, kind=None):
+        return self._per_month(np.clip(self.amount, 0, None), kind)
+
+    def liabilities_by_month(self, kind=None):
+        return self._per_month(-np.clip(self.amount, None, 0), kind)
+
+    def balance_by_month(self, kind=None):
+        return self.totals_by_month(kind)
+
+    def _per_year(self, per_month):
+        years, index = np.unique(self.months // 12, return_inverse=True)
+        return years, np.bincount(index, weights=per_month, minlength=len(years))
+
+    def totals_by_year(self, kind=None):
+        return self._per_year(self.totals_by_month(kind))
+
+    def assets_and_liabilities_by_year(self, kind=None):
+        years, assets = self._per_year(self.assets_by_month(kind))
+        _, liabilities = self._per_year(self.liabilities_by_month(kind))
+        return years, assets, liabilities
+
+    def totals_by_item(self, kind=None):
+        mask = self._mask(kind)
+        totals = np.bincount(
+            self.name_id[mask], weights=self.amount[mask], minlength=len(self.names)
+        )
+        present = np.bincount(self.name_id[mask], minlength=len(self.names)) > 0
+        return {self.names[i]: totals[i] for i in np.flatnonzero(present)}
+
+    def item_history(self, name, kind=None):
+        """Amount of one item per month, NaN where the month lacks it."""
+        out = np.full(len(self.months), np.nan)
+        if name not in self._name_ids:
+            return out
+        rows = self.name_id == self._name_ids[name]
+        if kind is not None:
+            rows &= self.kind == kind
+        # Sum in case the name exists as both a static and a variable item
+        totals = np.bincount(
+            self.month_index[rows], weights=self.amount[rows], minlength=len(out)
+        )
+        present = np.bincount(self.month_index[rows], minlength=len(out)) > 0
+        out[present] = totals[present]
+        return out
+
+    def static_paid_share(self):
+        """Fraction of each month's static items marked paid (NaN if none)."""
+        static = self.kind == STATIC
+        count = np.bincount(self.month_index[static], minlength=len(self.months))
+        paid = np.bincount(
+            self.month_index[static],
+            weights=self.paid[static].astype(np.float64),
+            minlength=len(self.months),
+        )
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(count > 0, paid / np.maximum(count, 1), np.nan)
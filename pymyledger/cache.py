@@ -1,8 +1,13 @@
+from dataclasses import asdict, dataclass, field
+import hashlib
 import logging
 import sys
 import os
 from pathlib import Path
 import json
+from typing import List, Optional
+
+from .model import Data, MonthKey, StaticLineItem, VariableLineItem
 
 
 logger = logging.getLogger(__name__)
@@ -103,3 +108,95 @@ class Cache:
         logger.info("Saving cache to %s", self._fp)
         with open(self._fp, "w") as f:
             json.dump(self.data, f)
+
+
+@dataclass
+class Summary:  # pylint: disable=R0902
+    """What the window shows of a ledger file, small enough to read before
+    the file itself. Valid while the file's mtime and size are unchanged."""
+
+    path: str
+    mtime_ns: int
+    size: int
+    months: List[int] = field(default_factory=list)
+    month: Optional[int] = None
+    static: list = field(default_factory=list)
+    variable: list = field(default_factory=list)
+    assets: int = 0
+    liabilities: int = 0
+
+    @classmethod
+    def of(cls, fp, data: Data, month: MonthKey = None):
+        stat = os.stat(fp)
+        summary = cls(fp, stat.st_mtime_ns, stat.st_size)
+        summary.months = [m.ordinal for m in data.months_available]
+        if month is not None and month in data.ledger.months:
+            static, variable = data.static_and_variable(month)
+            summary.month = month.ordinal
+            summary.static = [[i.name, i.amount, i.paid] for i in static]
+            summary.variable = [[i.name, i.amount] for i in variable]
+            summary.assets, summary.liabilities = data.assets_and_liabilities(month)
+        return summary
+
+    def is_current(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return (stat.st_mtime_ns, stat.st_size) == (self.mtime_ns, self.size)
+
+    @property
+    def month_keys(self):
+        return [MonthKey.from_ordinal(m) for m in self.months]
+
+    @property
+    def month_key(self):
+        return None if self.month is None else MonthKey.from_ordinal(self.month)
+
+    @property
+    def items(self):
+        """The summarized month's static and variable items."""
+        return (
+            [StaticLineItem(*i) for i in self.static],
+            [VariableLineItem(*i) for i in self.variable],
+        )
+
+
+class SummaryCache:
+    """One Summary per ledger file, stored beside the application cache."""
+
+    def __init__(self, appname):
+        self._dir = os.path.join(user_cache_dir(appname), "summaries")
+        Path(self._dir).mkdir(parents=True, exist_ok=True)
+
+    def _fp(self, path):
+        key = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+        return os.path.join(self._dir, key + ".json")
+
+    def get(self, path) -> Optional[Summary]:
+        fp = self._fp(path)
+        try:
+            with open(fp, "r") as f:
+                summary = Summary(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.exception("Could not load summary %s", fp)
+            return None
+        if not summary.is_current():
+            logger.info("Discarding summary of changed file %s", path)
+            self.discard(path)
+            return None
+        return summary
+
+    def put(self, summary: Summary):
+        fp = self._fp(summary.path)
+        logger.info("Saving summary of %s to %s", summary.path, fp)
+        with open(fp, "w") as f:
+            json.dump(asdict(summary), f)
+
+    def discard(self, path):
+        try:
+            os.remove(self._fp(path))
+        except FileNotFoundError:
+            pass
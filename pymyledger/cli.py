@@ -0,0 +1,204 @@
+"""Work with ledger files without starting the GUI.
+
+    python -m pymyledger.cli summary ledger.pml [--month 2020-01]
+    python -m pymyledger.cli add-month ledger.pml 2020-02
+    python -m pymyledger.cli set ledger.pml 2020-02 Rent -1200 [--paid]
+    python -m pymyledger.cli export ledger.pml [--format json] [-o out.csv]
+
+Only the model and serializers are imported; Qt never is.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import sys
+
+from .convert import version_of
+from .model import Data, MonthKey
+from .serialize import Serializer, SqliteStore
+
+
+logger = logging.getLogger(__name__)
+
+_month_re = re.compile(r"^(\d{4})-(\d{1,2})$")
+
+
+def month_arg(text):
+    """A month given as ``2020-01`` or as displayed, ``Jan 2020``."""
+    match = _month_re.match(text)
+    try:
+        if match:
+            return MonthKey(int(match.group(1)), int(match.group(2)))
+        return MonthKey.from_display(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError("not a month: %r" % text) from None
+
+
+def _load(fp) -> Data:
+    return Serializer(fp).load(lazy=True)
+
+
+def _save(fp, data: Data):
+    # Keep the file in the format it was in
+    version = None if SqliteStore.handles(fp) else version_of(fp)
+    Serializer(fp).save(data, version)
+
+
+def summary(args):
+    data = _load(args.file)
+    if args.month is not None:
+        if args.month not in data.ledger.months:
+            return "No month %s" % args.month.display
+        static, variable = data.static_and_variable(args.month)
+        for item in static:
+            paid = "paid" if item.paid else "unpaid"
+            print("static\t%s\t%s\t%s" % (item.name, item.amount, paid))
+        for item in variable:
+            print("variable\t%s\t%s" % (item.name, item.amount))
+        months = [args.month]
+    else:
+        months = data.ledger.sorted_months
+    for month in months:
+        assets, liabilities = data.assets_and_liabilities(month)
+        print(
+            "%s\t%s\t%s\t%s"
+            % (month.display, assets, liabilities, assets - liabilities),
+        )
+    return None
+
+
+def add_month(args):
+    data = _load(args.file)
+    if args.month in data.ledger.months:
+        return "Month %s already exists" % args.month.display
+    data.add_month(args.month)
+    _save(args.file, data)
+    print("Added %s" % args.month.display)
+    return None
+
+
+def set_item(args):
+    if args.amount is None and args.paid is None:
+        return "Nothing to set; give an amount, --paid or --unpaid"
+    data = _load(args.file)
+    if args.month not in data.ledger.months:
+        return "No month %s" % args.month.display
+    if data.get_static(args.month, args.name) is not None:
+        data.update_static(args.month, args.name, amount=args.amount, paid=args.paid)
+    elif data.get_variable(args.month, args.name) is not None:
+        if args.paid is not None:
+            return "%s is a variable item and has no paid flag" % args.name
+        data.update_variable(args.month, args.name, amount=args.amount)
+    else:
+        return "No item %s in %s" % (args.name, args.month.display)
+    _save(args.file, data)
+    print("Set %s in %s" % (args.name, args.month.display))
+    return None
+
+
+def rows(data: Data):
+    """One dict per line item, in month order."""
+    for month in data.ledger.sorted_months:
+        static, variable = data.static_and_variable(month)
+        key = "%d-%02d" % (month.year, month.month)
+        for item in static:
+            yield {
+                "month": key,
+                "kind": "static",
+                "name": item.name,
+                "amount": item.amount,
+                "paid": item.paid,
+            }
+        for item in variable:
+            yield {
+                "month": key,
+                "kind": "variable",
+                "name": item.name,
+                "amount": item.amount,
+                "paid": None,
+            }
+
+
+def export(args):
+    data = _load(args.file)
+    f = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        if args.format == "json":
+            for row in rows(data):
+                f.write(json.dumps(row) + "\n")
+        else:
+            writer = csv.DictWriter(
+                f, fieldnames=["month", "kind", "name", "amount", "paid"]
+            )
+            writer.writeheader()
+            writer.writerows(rows(data))
+    finally:
+        if f is not sys.stdout:
+            f.close()
+
+
+def amount_arg(text):
+    try:
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError("amount must be an integer") from None
+
+
+def parser():
+    p = argparse.ArgumentParser(
+        prog="python -m pymyledger.cli", description=__doc__.splitlines()[0]
+    )
+    commands = p.add_subparsers(dest="command", required=True)
+
+    c = commands.add_parser("summary", help="totals per month, or one month's items")
+    c.add_argument("file")
+    c.add_argument("--month", type=month_arg)
+    c.set_defaults(func=summary)
+
+    c = commands.add_parser(
+        "add-month", help="add a month, carrying items forward from the one before"
+    )
+    c.add_argument("file")
+    c.add_argument("month", type=month_arg)
+    c.set_defaults(func=add_month)
+
+    c = commands.add_parser("set", help="set an item's amount or paid flag")
+    c.add_argument("file")
+    c.add_argument("month", type=month_arg)
+    c.add_argument("name")
+    c.add_argument("amount", type=amount_arg, nargs="?")
+    paid = c.add_mutually_exclusive_group()
+    paid.add_argument("--paid", action="store_true", default=None)
+    paid.add_argument("--unpaid", dest="paid", action="store_false", default=None)
+    c.set_defaults(func=set_item)
+
+    c = commands.add_parser("export", help="write every line item as CSV or JSON")
+    c.add_argument("file")
+    c.add_argument("--format", choices=["csv", "json"], default="csv")
+    c.add_argument("-o", "--output", help="output file (default: stdout)")
+    c.set_defaults(func=export)
+    return p
+
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    if not os.path.exists(args.file):
+        # A database would otherwise be created empty
+        error = "No such file: %s" % args.file
+    else:
+        try:
+            error = args.func(args)
+        except (OSError, ValueError) as e:
+            logger.debug("%s failed", args.command, exc_info=True)
+            error = "Unable to %s %s: %s" % (args.command, args.file, e)
+    if error:
+        print(error, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""Convert ledger files between formats without loading them whole.
+
+    python -m pymyledger.convert old.pml new.pml --to 1
+    python -m pymyledger.convert archive/ converted/ --jobs 4
+
+Months are read and written one at a time, so memory stays proportional
+to the largest month plus the item name table rather than to the file
+(writing v2, to the largest closed year, which is compressed as a whole).
+A directory is converted file by file in a pool of worker processes.
+
+Months are written in the order the source lists them. For files listing
+them in order, as every save does, the output is the same bytes a
+regular save would write; otherwise months and names are stored in
+another order but load the same.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+import itertools
+import logging
+import mmap
+import os
+import sys
+import tempfile
+import zlib
+
+from .model import NameTable
+from .serialize import Serializer, SqliteStore
+from .serialize.v0 import JsonMonthSource, SerializerV0
+from .serialize.v1 import MAGIC, SerializerV1
+from .serialize.v2 import UNCOMPRESSED, SerializerV2
+
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+EXTENSION = ".pml"
+
+
+def read_v0(fp, chunk_size=CHUNK_SIZE):
+    """Yield ``(MonthKey, MonthBudget)`` pairs from a v0 file in file order.
+
+    The text is read in chunks; each month's object is decoded as soon as
+    it is complete and dropped from the buffer.
+    """
+    with open(fp, "r", encoding="utf-8") as f:
+        buf = ""
+        eof = False
+        while True:
+            try:
+                found = JsonMonthSource.next_month(buf)
+            except ValueError:
+                # The month's object continues in the next chunk
+                if eof:
+                    raise
+            else:
+                if found is not None:
+                    month, obj, end = found
+                    yield month, SerializerV0.deserialize_month(obj)
+                    buf = buf[end:]
+                    continue
+            if eof:
+                return
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf += chunk
+
+
+def read_v1(fp, serializer=SerializerV1):
+    """Yield ``(MonthKey, MonthBudget)`` pairs from a v1 file in month order."""
+    with open(fp, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    source = serializer.month_source(buf)
+    for month in sorted(source.keys()):
+        yield month, source.load(month)
+
+
+def read_v2(fp):
+    """Like read_v1; a closed year is decompressed as its first month is
+    read and dropped soon after its last."""
+    return read_v1(fp, SerializerV2)
+
+
+def write_v0(f, months):
+    f.write(SerializerV0.document_head())
+    for i, (month, budget) in enumerate(months):
+        if i:
+            f.write(b", ")
+        f.write(SerializerV0.month_entry(month, SerializerV0.encode_month(budget)))
+    f.write(SerializerV0.document_tail)
+
+
+def write_v1(f, months):
+    ser = SerializerV1
+    names = NameTable()
+    f.write(ser.header.pack(MAGIC, ser.version()))
+    offset = ser.header.size
+    directory = []
+    for month, budget in months:
+        block = ser.encode_month(budget, names)
+        directory.append((month.ordinal, offset, len(block)))
+        f.write(block)
+        offset += len(block)
+    # v0 files need not list their months in order
+    directory.sort()
+    index = bytearray()
+    ser.write_index(index, names, directory, offset)
+    f.write(index)
+
+
+def write_v2(f, months):
+    """Like write_v1, except that each closed year is held until it is
+    complete and then written as one compressed chunk."""
+    ser = SerializerV2
+    names = NameTable()
+    f.write(ser.header.pack(MAGIC, ser.version()))
+    offset = ser.header.size
+    directory = []
+    chunks = []
+    # A year listed in several runs gets a chunk per run; it still loads
+    for year, run in itertools.groupby(months, key=lambda pair: pair[0].year):
+        if year >= ser.open_year():
+            for month, budget in run:
+                block = ser.encode_month(budget, names)
+                directory.append((month.ordinal, offset, len(block), UNCOMPRESSED))
+                f.write(block)
+                offset += len(block)
+            continue
+        plain = bytearray()
+        for month, budget in run:
+            block = ser.encode_month(budget, names)
+            directory.append((month.ordinal, len(plain), len(block), len(chunks)))
+            plain += block
+        compressed = zlib.compress(plain, ser.compression_level)
+        chunks.append((offset, len(compressed)))
+        f.write(compressed)
+        offset += len(compressed)
+    directory.sort()
+    index = bytearray()
+    ser.write_chunked_index(index, names, directory, chunks, offset)
+    f.write(index)
+
+
+readers = {0: read_v0, 1: read_v1, 2: read_v2}
+writers = {0: write_v0, 1: write_v1, 2: write_v2}
+
+
+def version_of(fp):
+    # The version is in the binary header, or right after the application
+    # name at the start of a JSON file
+    with open(fp, "rb") as f:
+        return Serializer.version_of(f.read(4096))
+
+
+@contextmanager
+def replacing(fp):
+    """A file to write ``fp``'s new contents to; it only replaces ``fp``
+    once the block completes."""
+    directory = os.path.dirname(os.path.abspath(fp))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+        os.replace(tmp, fp)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def convert_file(src, dst=None, version=None):
+    """Convert ``src`` to ``version`` (the latest by default) at ``dst``
+    (in place by default) and return ``dst``."""
+    dst = src if dst is None else dst
+    version = Serializer.latest_version() if version is None else version
+    source_version = None if SqliteStore.handles(src) else version_of(src)
+    streamed = source_version in readers and version in writers
+    if streamed and not SqliteStore.handles(dst):
+        with replacing(dst) as f:
+            writers[version](f, readers[source_version](src))
+    else:
+        data = Serializer(src).load(lazy=True)
+        Serializer(dst).save(data, version)
+    return dst
+
+
+def convert_directory(src_dir, dst_dir=None, version=None, jobs=None):
+    """Convert every ledger file in ``src_dir`` in parallel; return the
+    paths that failed."""
+    dst_dir = src_dir if dst_dir is None else dst_dir
+    os.makedirs(dst_dir, exist_ok=True)
+    names = sorted(n for n in os.listdir(src_dir) if n.endswith(EXTENSION))
+    failed = []
+    with ProcessPoolExecutor(jobs) as pool:
+        futures = {
+            pool.submit(
+                convert_file,
+                os.path.join(src_dir, name),
+                os.path.join(dst_dir, name),
+                version,
+            ): os.path.join(src_dir, name)
+            for name in names
+        }
+        for future in as_completed(futures):
+            src = futures[future]
+            try:
+                logger.info("Converted %s to %s", src, future.result())
+            except Exception:  # pylint: disable=W0703
+                logger.exception("Could not convert %s", src)
+                failed.append(src)
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m pymyledger.convert", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("src", help="ledger file or directory of .pml files")
+    parser.add_argument("dst", nargs="?", help="output path (default: in place)")
+    parser.add_argument(
+        "--to",
+        type=int,
+        default=Serializer.latest_version(),
+        help="format version to write (default: %(default)s)",
+    )
+    parser.add_argument("-j", "--jobs", type=int, help="worker processes")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    if os.path.isdir(args.src):
+        return 1 if convert_directory(args.src, args.dst, args.to, args.jobs) else 0
+    convert_file(args.src, args.dst, args.to)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Dict
+
+from .names import NameTable
+
+
+class LazyMonths(MutableMapping):
+    """Month budgets decoded from a source on first access.
+
+    ``source`` provides ``keys()`` and ``load(month)``. Decoded months are
+    kept in an LRU of at most ``cache_size`` entries; pinned months (new
+    or edited and not yet saved) are held outside the LRU and never
+    evicted.
+    """
+
+    def __init__(self, source, cache_size=24):
+        self.source = source
+        self.cache_size = cache_size
+        self.names: NameTable = None
+        self._keys = set(source.keys())
+        self._lru: "OrderedDict[MonthKey, MonthBudget]" = OrderedDict()
+        self._pinned: Dict["MonthKey", "MonthBudget"] = {}
+
+    def __getitem__(self, month):
+        budget = self._pinned.get(month)
+        if budget is not None:
+            return budget
+        budget = self._lru.get(month)
+        if budget is not None:
+            self._lru.move_to_end(month)
+            return budget
+        if month not in self._keys:
+            raise KeyError(month)
+        budget = self.source.load(month)
+        if self.names is not None:
+            budget.intern_names(self.names)
+        self._lru[month] = budget
+        self._trim()
+        return budget
+
+    def __setitem__(self, month, budget):
+        self._keys.add(month)
+        self._lru.pop(month, None)
+        self._pinned[month] = budget
+
+    def __delitem__(self, month):
+        self._keys.remove(month)
+        self._lru.pop(month, None)
+        self._pinned.pop(month, None)
+
+    def __contains__(self, month):
+        return month in self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def resident(self):
+        return len(self._lru) + len(self._pinned)
+
+    def is_loaded(self, month):
+        return month in self._pinned or month in self._lru
+
+    def pin(self, month):
+        if month not in self._pinned:
+            self._pinned[month] = self[month]
+            self._lru.pop(month, None)
+
+    def unpin_all(self):
+        self._lru.update(self._pinned)
+        self._pinned.clear()
+        self._trim()
+
+    def snapshot(self):
+        """Same source and keys, with copies of the unsaved months."""
+        snap = LazyMonths(self.source, self.cache_size)
+        for month in set(snap) - self._keys:
+            del snap[month]
+        for month, budget in self._pinned.items():
+            snap[month] = budget.copy()
+        return snap
+
+    def _trim(self):
+        while len(self._lru) > self.cache_size:
+            self._lru.popitem(last=False)
@@ -1,12 +1,13 @@
 import logging
 
-from .pymyledger import PyMyLedger
-
 
 def main():
     logging.basicConfig(level=logging.DEBUG)
     logging.debug("Logging configured")
     logging.debug("Starting application")
+    # Qt is only imported once the GUI is actually starting
+    from .pymyledger import PyMyLedger  # pylint: disable=C0415
+
     PyMyLedger()
 
 if __name__ == "__main__":
@@ -1,23 +1,98 @@
+from array import array
+import bisect
+import copy
 from dataclasses import dataclass, field
 import datetime
-import itertools
-from typing import List, Mapping
+import functools
+import math
+from typing import Callable, Dict, Iterable, List, Mapping, Set
 
+from .lazy import LazyMonths
+from .names import NameTable
 
-@dataclass(frozen=True)
+
+@functools.total_ordering
 class MonthKey:
+    """A calendar month.
+
+    Keys are interned, so there is exactly one instance per year/month and
+    the display text and neighbouring months are computed at most once.
+    """
+
+    __slots__ = ("year", "month", "ordinal", "_display", "_prev", "_next")
+
+    # Set once in __new__, which bypasses the __setattr__ guard
     year: int
     month: int
+    ordinal: int
+    _display: str
+    _prev: "MonthKey"
+    _next: "MonthKey"
+
+    _interned: Dict[int, "MonthKey"] = {}
+    _by_display: Dict[str, "MonthKey"] = {}
+
+    def __new__(cls, year: int, month: int):
+        # Checked before the lookup: 2020-13 has the ordinal of 2021-01
+        if not 1 <= month <= 12:
+            raise ValueError("month must be in 1..12, got %s" % month)
+        ordinal = year * 12 + month - 1
+        key = cls._interned.get(ordinal)
+        if key is None:
+            key = object.__new__(cls)
+            values = (year, month, ordinal, None, None, None)
+            for attr, value in zip(cls.__slots__, values):
+                object.__setattr__(key, attr, value)
+            key = cls._interned.setdefault(ordinal, key)
+        return key
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MonthKey is immutable")
+
+    def __reduce__(self):
+        return (MonthKey, (self.year, self.month))
+
+    def __repr__(self):
+        return "MonthKey(year=%d, month=%d)" % (self.year, self.month)
+
+    def __hash__(self):
+        return hash(self.ordinal)
+
+    def __eq__(self, other):
+        if not isinstance(other, MonthKey):
+            return NotImplemented
+        return self.ordinal == other.ordinal
+
+    def __lt__(self, other):
+        if not isinstance(other, MonthKey):
+            return NotImplemented
+        return self.ordinal < other.ordinal
 
     @classmethod
     def from_date(cls, dt):
         return cls(dt.year, dt.month)
 
+    @classmethod
+    def from_ordinal(cls, ordinal):
+        year, month = divmod(ordinal, 12)
+        return cls(year, month + 1)
+
+    @classmethod
+    def from_display(cls, text):
+        key = cls._by_display.get(text)
+        if key is None:
+            dt = datetime.datetime.strptime(text, cls.month_format())
+            key = cls.from_date(dt)
+            cls._by_display[text] = key
+        return key
+
     @property
     def display(self):
-        return datetime.datetime(year=self.year, month=self.month, day=1).strftime(
-            self.month_format()
-        )
+        if self._display is None:
+            text = datetime.date(self.year, self.month, 1).strftime(self.month_format())
+            object.__setattr__(self, "_display", text)
+            self._by_display.setdefault(text, self)
+        return self._display
 
     @classmethod
     def month_format(cls):
@@ -25,64 +100,807 @@ class MonthKey:
 
     @property
     def prev(self):
-        if self.month > 1:
-            return MonthKey(self.year, self.month - 1)
-        return MonthKey(self.year - 1, 12)
+        if self._prev is None:
+            object.__setattr__(self, "_prev", MonthKey.from_ordinal(self.ordinal - 1))
+        return self._prev
+
+    @property
+    def next(self):
+        if self._next is None:
+            object.__setattr__(self, "_next", MonthKey.from_ordinal(self.ordinal + 1))
+        return self._next
 
 
-@dataclass
 class LineItem:
-    name: str
-    amount: float = 0
+    __slots__ = ("name", "amount")
+    _fields = ("name", "amount")
 
+    def __init__(self, name: str, amount: float = 0):
+        self.name = name
+        self.amount = amount
 
-@dataclass
-class StaticLineItem(LineItem):
-    paid: bool = False
+    def __eq__(self, other):
+        if not isinstance(other, LineItem) or self._fields != other._fields:
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self._fields)
 
+    __hash__ = None
 
-@dataclass
-class VariableLineItem(LineItem):
-    pass
+    def __repr__(self):
+        fields = ", ".join("%s=%r" % (f, getattr(self, f)) for f in self._fields)
+        return "%s(%s)" % (type(self).__name__, fields)
+
+
+class StaticLineItem(LineItem):  # pylint: disable=R0903
+    __slots__ = ("paid",)
+    _fields = ("name", "amount", "paid")
+
+    def __init__(self, name: str, amount: float = 0, paid: bool = False):
+        super().__init__(name, amount)
+        self.paid = paid
+
+
+class VariableLineItem(LineItem):  # pylint: disable=R0903
+    __slots__ = ()
+
+
+class LineItems:
+    """Line items in insertion order, indexed by name.
+
+    Running asset and liability totals are kept up to date as long as
+    amounts are changed through ``set_amount``.
+    """
+
+    def __init__(self, items: Iterable[LineItem] = ()):
+        self._items: List[LineItem] = []
+        self._index: Dict[str, LineItem] = {}
+        self.assets = 0
+        self.liabilities = 0
+        for item in items:
+            self.append(item)
+
+    def append(self, item: LineItem):
+        if item.name in self._index:
+            raise ValueError("%s already exists" % item.name)
+        self._index[item.name] = item
+        self._items.append(item)
+        self._tally(item.amount)
+
+    def set_amount(self, name, amount):
+        item = self._index[name]
+        old = item.amount
+        self._tally(old, -1)
+        item.amount = amount
+        self._tally(amount)
+        return old
+
+    def intern_names(self, names: NameTable):
+        for item in self._items:
+            item.name = names.intern(item.name)
+        self._index = {item.name: item for item in self._items}
+
+    def _tally(self, amount, sign=1):
+        if amount > 0:
+            self.assets += sign * amount
+        elif amount < 0:
+            self.liabilities -= sign * amount
+
+    def recompute_totals(self):
+        assets = liabilities = 0
+        for i in self:
+            if i.amount > 0:
+                assets += i.amount
+            if i.amount < 0:
+                liabilities -= i.amount
+        return assets, liabilities
+
+    def get(self, name):
+        return self._index.get(name)
+
+    def names(self):
+        return [i.name for i in self._items]
+
+    def amounts(self):
+        return [i.amount for i in self._items]
+
+    def paid_flags(self):
+        return bytes(bool(getattr(i, "paid", False)) for i in self._items)
+
+    def copy(self, item_type):
+        return PackedLineItems(item_type, self)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __getitem__(self, i):
+        return self._items[i]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, list(self))
+
+
+class PackedStaticLineItem(StaticLineItem):
+    """A StaticLineItem that reads and writes through to PackedLineItems."""
+
+    __slots__ = ("_items", "_i")
+
+    # Set by PackedLineItems, which creates views without __init__
+    _items: "PackedLineItems"
+    _i: int
+
+    name = property(lambda self: self._items.name_at(self._i))
+    amount = property(
+        lambda self: self._items.amount_at(self._i),
+        lambda self, v: self._items.set_amount(self.name, v),
+    )
+    paid = property(
+        lambda self: self._items.paid_at(self._i),
+        lambda self, v: self._items.set_paid_at(self._i, v),
+    )
+
+
+class PackedVariableLineItem(VariableLineItem):  # pylint: disable=R0903
+    """A VariableLineItem that reads and writes through to PackedLineItems."""
+
+    __slots__ = ("_items", "_i")
+
+    _items: "PackedLineItems"
+    _i: int
+
+    name = PackedStaticLineItem.name
+    amount = PackedStaticLineItem.amount
+
+
+class PackedLineItems(LineItems):  # pylint: disable=R0902
+    """Array-backed LineItems.
+
+    Names, amounts and paid flags live in parallel columns instead of one
+    object per item; items are handed out as lightweight views. Columns
+    may be shared with the month this one was carried forward from and
+    are copied the first time either side writes to them.
+    """
+
+    _views = {
+        StaticLineItem: PackedStaticLineItem,
+        VariableLineItem: PackedVariableLineItem,
+    }
+    _columns = ("_names", "_index", "_amounts", "_paid")
+
+    # pylint: disable=W0231
+    def __init__(self, item_type, items=(), columns=None, shared=()):
+        """``columns`` are existing names, index, amounts and paid columns
+        to wrap; the ``shared`` ones are copied before they are written."""
+        self._view = self._views[item_type]
+        if columns is None:
+            # Amounts stay integral until a float amount is stored
+            columns = ([], {}, array("q"), bytearray())
+        self._names, self._index, self._amounts, paid = columns
+        self._paid = paid if item_type is StaticLineItem else None
+        self._owned = set(self._columns) - set(shared)
+        self.assets = sum(a for a in self._amounts if a > 0)
+        self.liabilities = -sum(a for a in self._amounts if a < 0)
+        for item in items:
+            self.append(item)
+
+    @classmethod
+    def from_columns(cls, item_type, name_columns, amounts, paid=None):
+        """Wrap existing columns; the ``(names, index)`` pair may be shared."""
+        names, index = name_columns
+        columns = (names, index, amounts, paid)
+        return cls(item_type, columns=columns, shared=("_names", "_index"))
+
+    @classmethod
+    def carried_from(cls, items: LineItems, item_type, keep_amounts):
+        """Start a new month from ``items``.
+
+        Names (and amounts, when kept) are shared with ``items``; paid
+        flags are cleared and dropped amounts reset to zero.
+        """
+        if not isinstance(items, PackedLineItems):
+            items = cls(item_type, items)
+        columns, shared = items.share_columns(keep_amounts)
+        return cls(item_type, columns=columns, shared=shared)
+
+    def share_columns(self, keep_amounts):
+        """Columns for a month carried forward from this one and which of
+        them it shares; both sides copy a shared column before writing."""
+        n = len(self)
+        shared = {"_names", "_index"}
+        amounts = self._amounts
+        if keep_amounts or not (self.assets or self.liabilities):
+            shared.add("_amounts")
+        else:
+            amounts = array("q", bytes(8 * n))
+        paid = self._paid
+        if paid is not None and any(paid):
+            paid = bytearray(n)
+        elif paid is not None:
+            shared.add("_paid")
+        self._owned -= shared
+        return (self._names, self._index, amounts, paid), shared
+
+    def _own(self, *columns):
+        for column in columns:
+            if column not in self._owned:
+                setattr(self, column, copy.copy(getattr(self, column)))
+                self._owned.add(column)
+
+    def append(self, item: LineItem):
+        if item.name in self._index:
+            raise ValueError("%s already exists" % item.name)
+        self._own(*self._columns)
+        self._index[item.name] = len(self._names)
+        self._names.append(item.name)
+        self._amounts.append(self._store(0))
+        if self._paid is not None:
+            self._paid.append(bool(getattr(item, "paid", False)))
+        self._set_amount_at(len(self._names) - 1, item.amount)
+
+    def set_amount(self, name, amount):
+        return self._set_amount_at(self._index[name], amount)
+
+    def _set_amount_at(self, i, amount):
+        self._own("_amounts")
+        old = self._amounts[i]
+        self._tally(old, -1)
+        self._amounts[i] = self._store(amount)
+        self._tally(amount)
+        return old
+
+    def _store(self, amount):
+        # Any float, whole or not, since "q" only takes ints
+        if self._amounts.typecode == "q" and isinstance(amount, float):
+            self._amounts = array("d", self._amounts)
+        return amount
+
+    def name_at(self, i):
+        return self._names[i]
+
+    def amount_at(self, i):
+        return self._amounts[i]
+
+    def paid_at(self, i):
+        return bool(self._paid[i])
+
+    def set_paid_at(self, i, paid):
+        self._own("_paid")
+        self._paid[i] = bool(paid)
+
+    def intern_names(self, names: NameTable):
+        interned = [names.intern(n) for n in self._names]
+        if any(a is not b for a, b in zip(interned, self._names)):
+            self._names = interned
+            self._index = {n: i for i, n in enumerate(self._names)}
+            self._owned.update(("_names", "_index"))
+
+    def names(self):
+        return self._names
+
+    def amounts(self):
+        return self._amounts
+
+    def paid_flags(self):
+        return self._paid if self._paid is not None else bytes(len(self._names))
+
+    def copy(self, item_type):
+        """A copy sharing every column until either side writes to it."""
+        columns = (self._names, self._index, self._amounts, self._paid)
+        self._owned = set()
+        return type(self)(item_type, columns=columns, shared=self._columns)
+
+    def _item(self, i):
+        view = self._view.__new__(self._view)
+        object.__setattr__(view, "_items", self)
+        object.__setattr__(view, "_i", i)
+        return view
+
+    def get(self, name):
+        i = self._index.get(name)
+        return None if i is None else self._item(i)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._item(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._item(i)
+
+    def __iter__(self):
+        return (self._item(i) for i in range(len(self._names)))
 
 
 @dataclass
 class MonthBudget:
-    static: List[StaticLineItem] = field(default_factory=list)
-    variable: List[VariableLineItem] = field(default_factory=list)
+    static: LineItems = field(default_factory=LineItems)
+    variable: LineItems = field(default_factory=LineItems)
+
+    def __post_init__(self):
+        if not isinstance(self.static, LineItems):
+            self.static = LineItems(self.static)
+        if not isinstance(self.variable, LineItems):
+            self.variable = LineItems(self.variable)
+
+    @property
+    def packed(self):
+        return isinstance(self.static, PackedLineItems)
+
+    def pack(self):
+        """Switch to array-backed storage for this month's items."""
+        if not self.packed:
+            self.static = PackedLineItems(StaticLineItem, self.static)
+            self.variable = PackedLineItems(VariableLineItem, self.variable)
+
+    def intern_names(self, names: NameTable):
+        self.static.intern_names(names)
+        self.variable.intern_names(names)
+
+    def copy(self):
+        return MonthBudget(
+            self.static.copy(StaticLineItem), self.variable.copy(VariableLineItem)
+        )
+
+    def carry_forward(self):
+        """A new month with this month's items, copy-on-write.
+
+        Static items keep their amounts and are marked unpaid; variable
+        items start at zero.
+        """
+        return MonthBudget(
+            PackedLineItems.carried_from(self.static, StaticLineItem, True),
+            PackedLineItems.carried_from(self.variable, VariableLineItem, False),
+        )
+
+    @property
+    def assets(self):
+        return self.static.assets + self.variable.assets
+
+    @property
+    def liabilities(self):
+        return self.static.liabilities + self.variable.liabilities
+
+    def check_totals(self):
+        for items in (self.static, self.variable):
+            expected = items.recompute_totals()
+            actual = (items.assets, items.liabilities)
+            if not all(math.isclose(a, e) for a, e in zip(actual, expected)):
+                raise AssertionError(
+                    "Running totals %s do not match recomputed %s" % (actual, expected)
+                )
 
 
 @dataclass
 class Ledger:
     months: Mapping[MonthKey, MonthBudget] = field(default_factory=dict)
+    # Month keys in ascending order, with their ordinals for bisection
+    _sorted: List[MonthKey] = field(init=False, repr=False, compare=False)
+    _ordinals: List[int] = field(init=False, repr=False, compare=False)
+    names: NameTable = field(default_factory=NameTable, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._sorted = sorted(self.months, key=lambda k: k.ordinal)
+        self._ordinals = [k.ordinal for k in self._sorted]
+        if isinstance(self.months, LazyMonths):
+            self.months.names = self.names
+        else:
+            for budget in self.months.values():
+                budget.intern_names(self.names)
+
+    def add_month(self, month: MonthKey, budget: MonthBudget):
+        if month in self.months:
+            return self.months[month]
+        budget.intern_names(self.names)
+        self.months[month] = budget
+        i = bisect.bisect_left(self._ordinals, month.ordinal)
+        # Replaced rather than changed in place: snapshots share them
+        self._ordinals = self._ordinals[:i] + [month.ordinal] + self._ordinals[i:]
+        self._sorted = self._sorted[:i] + [month] + self._sorted[i:]
+        return budget
+
+    @property
+    def sorted_months(self) -> List[MonthKey]:
+        return self._sorted
+
+    def months_between(self, start: MonthKey, end: MonthKey) -> List[MonthKey]:
+        lo = bisect.bisect_left(self._ordinals, start.ordinal)
+        hi = bisect.bisect_right(self._ordinals, end.ordinal)
+        return self._sorted[lo:hi]
+
+    def last_months(self, n) -> List[MonthKey]:
+        return self._sorted[-n:] if n > 0 else []
+
+    def months_in_year(self, year) -> List[MonthKey]:
+        return self.months_between(MonthKey(year, 1), MonthKey(year, 12))
+
+    def month_before(self, month: MonthKey):
+        i = bisect.bisect_left(self._ordinals, month.ordinal)
+        return self._sorted[i - 1] if i else None
+
+    def pack(self, months: Iterable[MonthKey] = None):
+        """Move the given months (all by default) to array-backed storage."""
+        for month in self._sorted if months is None else months:
+            self.months[month].pack()
+
+    def pin(self, month: MonthKey):
+        if isinstance(self.months, LazyMonths):
+            self.months.pin(month)
+
+    def unpin_all(self):
+        if isinstance(self.months, LazyMonths):
+            self.months.unpin_all()
+
+    def snapshot(self, copy_months: Set[MonthKey]) -> "Ledger":
+        """A ledger to read on another thread while this one is edited.
+
+        Only ``copy_months`` (and a lazy ledger's unsaved months) are
+        copied; other budgets are shared with this ledger.
+        """
+        snap = copy.copy(self)
+        snap.names = NameTable(self.names)
+        if isinstance(self.months, LazyMonths):
+            snap.months = self.months.snapshot()
+            snap.months.names = snap.names
+        else:
+            snap.months = {
+                month: budget.copy() if month in copy_months else budget
+                for month, budget in self.months.items()
+            }
+        return snap
+
+
+@dataclass
+class ItemSeries:
+    name: str
+    months: List[MonthKey]
+    amounts: List[float]
+
+    @property
+    def deltas(self) -> List[float]:
+        """Month-over-month change; the first month has no predecessor."""
+        return [None] + [b - a for a, b in zip(self.amounts, self.amounts[1:])]
+
+    def rolling_average(self, window=3) -> List[float]:
+        """Trailing mean over up to ``window`` months."""
+        out = []
+        total = 0
+        for i, amount in enumerate(self.amounts):
+            total += amount
+            if i >= window:
+                total -= self.amounts[i - window]
+            out.append(total / min(i + 1, window))
+        return out
+
+
+class ItemHistoryIndex:
+    """Inverted index from item name to its amount in every month."""
+
+    def __init__(self):
+        self._ordinals: Dict[str, List[int]] = {}
+        self._amounts: Dict[str, Dict[int, float]] = {}
+
+    @classmethod
+    def from_ledger(cls, ledger: Ledger):
+        index = cls()
+        for month in ledger.sorted_months:
+            index.add_month(month, ledger.months[month])
+        return index
+
+    def add_month(self, month: MonthKey, budget: MonthBudget):
+        for items in (budget.static, budget.variable):
+            for name, amount in zip(items.names(), items.amounts()):
+                self.add(month, name, amount)
+
+    def add(self, month: MonthKey, name, amount):
+        amounts = self._amounts.setdefault(name, {})
+        if month.ordinal in amounts:
+            # The same name as both a static and a variable item
+            amounts[month.ordinal] += amount
+            return
+        amounts[month.ordinal] = amount
+        ordinals = self._ordinals.setdefault(name, [])
+        if ordinals and ordinals[-1] > month.ordinal:
+            bisect.insort(ordinals, month.ordinal)
+        else:
+            ordinals.append(month.ordinal)
+
+    def change(self, month: MonthKey, name, delta):
+        self._amounts[name][month.ordinal] += delta
+
+    def series(self, name) -> ItemSeries:
+        ordinals = self._ordinals.get(name, [])
+        amounts = self._amounts.get(name, {})
+        return ItemSeries(
+            name,
+            [MonthKey.from_ordinal(o) for o in ordinals],
+            [amounts[o] for o in ordinals],
+        )
+
+    def __contains__(self, name):
+        return name in self._amounts
 
 
 @dataclass
-class Data:
+class Rollup:
+    """Totals over a span of months, per kind and per item."""
+
+    months: int = 0
+    static_assets: float = 0
+    static_liabilities: float = 0
+    variable_assets: float = 0
+    variable_liabilities: float = 0
+    items: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def assets(self):
+        return self.static_assets + self.variable_assets
+
+    @property
+    def liabilities(self):
+        return self.static_liabilities + self.variable_liabilities
+
+    @property
+    def balance(self):
+        return self.assets - self.liabilities
+
+    def add_month(self, budget: MonthBudget):
+        self.months += 1
+        self.static_assets += budget.static.assets
+        self.static_liabilities += budget.static.liabilities
+        self.variable_assets += budget.variable.assets
+        self.variable_liabilities += budget.variable.liabilities
+        for items in (budget.static, budget.variable):
+            for name, amount in zip(items.names(), items.amounts()):
+                self.items[name] = self.items.get(name, 0) + amount
+
+    def add_rollup(self, other: "Rollup"):
+        self.months += other.months
+        self.static_assets += other.static_assets
+        self.static_liabilities += other.static_liabilities
+        self.variable_assets += other.variable_assets
+        self.variable_liabilities += other.variable_liabilities
+        for name, amount in other.items.items():
+            self.items[name] = self.items.get(name, 0) + amount
+
+
+@dataclass
+class Data:  # pylint: disable=R0902,R0904
     ledger: Ledger
+    # Verify running month totals against a full recompute after every change
+    debug: bool = False
+    # Built on first use by item_series, then kept up to date
+    _history: ItemHistoryIndex = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # Months changed since the last save
+    dirty: Set[MonthKey] = field(
+        default_factory=set, init=False, repr=False, compare=False
+    )
+    # Quarter, year and all-time rollups, dropped when a month inside changes
+    _rollups: Dict[tuple, Rollup] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    # Encoded months per serializer version, dropped when the month changes
+    _fragments: Dict[MonthKey, Dict[int, bytes]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    # Called with the month after every change
+    _listeners: List[Callable] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+    # Edits not yet written by a JournalStore, or None when not journaling
+    journal: List[list] = field(default=None, init=False, repr=False, compare=False)
 
     def add_month(self, month: MonthKey):
-        static, variable = self.static_and_variable(month.prev)
-        self.ledger.months.setdefault(
-            month,
-            MonthBudget(
-                [StaticLineItem(s.name, s.amount) for s in static],
-                [VariableLineItem(v.name) for v in variable]
-            ),
-        )
+        if month not in self.ledger.months:
+            budget = self.ledger.add_month(month, self._carried_budget(month))
+            self._record("add_month", month.ordinal)
+            self._month_added(month, budget)
+
+    def add_months(self, start: MonthKey, end: MonthKey):
+        """Add every missing month from start to end in one pass.
+
+        Each new month carries forward from the nearest earlier month.
+        """
+        self._record("add_months", start.ordinal, end.ordinal)
+        template = None
+        for ordinal in range(start.ordinal, end.ordinal + 1):
+            month = MonthKey.from_ordinal(ordinal)
+            budget = self.ledger.months.get(month)
+            if budget is None:
+                if template is None:
+                    budget = self._carried_budget(month)
+                else:
+                    budget = template.carry_forward()
+                self.ledger.add_month(month, budget)
+                self._month_added(month, budget)
+            template = budget
+
+    def _carried_budget(self, month: MonthKey):
+        prev = self.ledger.month_before(month)
+        if prev is None:
+            return MonthBudget()
+        return self.ledger.months[prev].carry_forward()
 
     def assets_and_liabilities(self, month: MonthKey):
         budget = self.ledger.months.get(month)
         if budget:
-            assets = liabilities = 0
-            for i in itertools.chain(budget.static, budget.variable):
-                if i.amount > 0:
-                    assets += i.amount
-                if i.amount < 0:
-                    liabilities -= i.amount
-            return assets, liabilities
+            return budget.assets, budget.liabilities
         return None
 
+    def item_series(self, name) -> ItemSeries:
+        if self._history is None:
+            self._history = ItemHistoryIndex.from_ledger(self.ledger)
+        return self._history.series(name)
+
+    def rollup(self, year=None, quarter=None) -> Rollup:
+        """Totals for a quarter (1-4) of a year, a whole year, or all time.
+
+        Years are built from their quarters and all time from the years,
+        so an edit only costs recomputing the spans that contain it.
+        """
+        if year is None:
+            key = ("all",)
+        elif quarter is None:
+            key = ("year", year)
+        else:
+            key = ("quarter", year, quarter)
+        rollup = self._rollups.get(key)
+        if rollup is None:
+            rollup = Rollup()
+            if year is None:
+                for y in sorted({m.year for m in self.ledger.sorted_months}):
+                    rollup.add_rollup(self.rollup(y))
+            elif quarter is None:
+                for q in range(1, 5):
+                    rollup.add_rollup(self.rollup(year, q))
+            else:
+                start = MonthKey(year, 3 * quarter - 2)
+                end = MonthKey(year, 3 * quarter)
+                for month in self.ledger.months_between(start, end):
+                    rollup.add_month(self.ledger.months[month])
+            self._rollups[key] = rollup
+        return rollup
+
+    def _invalidate_rollups(self, month):
+        quarter = (month.month - 1) // 3 + 1
+        for key in (("quarter", month.year, quarter), ("year", month.year), ("all",)):
+            self._rollups.pop(key, None)
+
+    def _month_added(self, month, budget):
+        if self._history is not None:
+            self._history.add_month(month, budget)
+        self._changed(month)
+
+    def _item_added(self, month, item):
+        if self._history is not None:
+            self._history.add(month, item.name, item.amount)
+        self._changed(month)
+
+    def _amount_changed(self, month, name, old, new):
+        if self._history is not None:
+            self._history.change(month, name, new - old)
+
+    def _record(self, op, *args):
+        if self.journal is not None:
+            self.journal.append([op, *args])
+
+    def replay(self, entry):
+        """Apply one journal entry recorded by ``_record``."""
+        op, *args = entry
+        if op == "add_month":
+            self.add_month(MonthKey.from_ordinal(args[0]))
+        elif op == "add_months":
+            self.add_months(
+                MonthKey.from_ordinal(args[0]), MonthKey.from_ordinal(args[1])
+            )
+        elif op == "add_static":
+            month, name, amount, paid = args
+            self.add_static_to_month(
+                MonthKey.from_ordinal(month), StaticLineItem(name, amount, paid)
+            )
+        elif op == "add_variable":
+            month, name, amount = args
+            self.add_variable_to_month(
+                MonthKey.from_ordinal(month), VariableLineItem(name, amount)
+            )
+        elif op == "update_static":
+            month, name, amount, paid = args
+            self.update_static(MonthKey.from_ordinal(month), name, amount, paid)
+        elif op == "update_variable":
+            month, name, amount = args
+            self.update_variable(MonthKey.from_ordinal(month), name, amount)
+        else:
+            raise ValueError("Unknown journal entry: %s" % op)
+
+    def cached_fragment(self, month, version):
+        return self._fragments.get(month, {}).get(version)
+
+    def cached_fragments(self):
+        """``(month, version, fragment)`` for every cached encoding."""
+        for month, fragments in self._fragments.items():
+            for version, fragment in fragments.items():
+                yield month, version, fragment
+
+    def cache_fragment(self, month, version, fragment):
+        # A lazy ledger re-reads clean months from its file, so keeping
+        # their encodings would hold the whole ledger in memory after all
+        if self._lazy and month not in self.dirty:
+            return
+        self._fragments.setdefault(month, {})[version] = fragment
+
+    @property
+    def _lazy(self):
+        return isinstance(self.ledger.months, LazyMonths)
+
+    def mark_saved(self):
+        self.dirty.clear()
+        self.ledger.unpin_all()
+        if self._lazy:
+            self._fragments.clear()
+
+    def snapshot(self, version=None) -> "Data":
+        """A copy to save on a worker thread while editing continues.
+
+        Months that will have to be encoded for ``version`` are copied
+        (copy-on-write where packed); the rest are only read through their
+        cached encoding. The dirty set moves to the snapshot; report the
+        outcome with ``snapshot_saved`` or ``snapshot_failed``.
+        """
+        copy_months = {
+            m for m in self.ledger.months if self.cached_fragment(m, version) is None
+        }
+        snap = Data(self.ledger.snapshot(copy_months))
+        snap.dirty, self.dirty = self.dirty, set()
+        for entry in self.cached_fragments():
+            snap.cache_fragment(*entry)
+        return snap
+
+    def snapshot_saved(self, snap: "Data"):
+        if self._lazy:
+            # Clean months are read back from the file just written, whose
+            # blocks refer to names by their ids in the snapshot's table
+            self.ledger.months.source = snap.ledger.months.source
+            self.ledger.names = self.ledger.months.names = snap.ledger.names
+            self._fragments.clear()
+        else:
+            for month, version, fragment in snap.cached_fragments():
+                if month not in self.dirty:
+                    self.cache_fragment(month, version, fragment)
+        self.ledger.unpin_all()
+        for month in self.dirty:
+            self.ledger.pin(month)
+
+    def snapshot_failed(self, snap: "Data"):
+        self.dirty |= snap.dirty
+
+    def add_listener(self, listener: Callable):
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _changed(self, month):
+        self.dirty.add(month)
+        self._fragments.pop(month, None)
+        self.ledger.pin(month)
+        self._invalidate_rollups(month)
+        if self.debug:
+            self.ledger.months[month].check_totals()
+        for listener in self._listeners:
+            listener(month)
+
     def static_and_variable(self, month: MonthKey):
         budget = self.ledger.months.get(month)
         if budget:
@@ -94,48 +912,50 @@ class Data:
 
     @property
     def months_available(self):
-        months = list(self.ledger.months.keys())
-        if months:
-            months.sort(key=lambda x: (-x.year, -x.month))
-            return months
-        return []
+        return self.ledger.sorted_months[::-1]
 
     def add_static_to_month(self, month, static):
-        static_list, _ = self.static_and_variable(month)
+        static_list = self.ledger.months[month].static
         if static.name in static_list:
             raise ValueError("%s already exists" % static.name)
+        static.name = self.ledger.names.intern(static.name)
         static_list.append(static)
+        self._record(
+            "add_static", month.ordinal, static.name, static.amount, static.paid
+        )
+        self._item_added(month, static)
 
     def add_variable_to_month(self, month, variable):
-        _, variable_list = self.static_and_variable(month)
+        variable_list = self.ledger.months[month].variable
         if variable.name in variable_list:
             raise ValueError("%s already exists" % variable.name)
+        variable.name = self.ledger.names.intern(variable.name)
         variable_list.append(variable)
+        self._record("add_variable", month.ordinal, variable.name, variable.amount)
+        self._item_added(month, variable)
 
     def update_variable(self, month, name, amount=None):
-        if amount:
+        if amount is not None:
             variable = self.ledger.months[month].variable
-            for var in variable:
-                if var.name == name:
-                    var.amount = amount
+            if name in variable:
+                old = variable.set_amount(name, amount)
+                self._record("update_variable", month.ordinal, name, amount)
+                self._amount_changed(month, name, old, amount)
+                self._changed(month)
 
     def get_variable(self, month, name):
-        variable = self.ledger.months[month].variable
-        for var in variable:
-            if var.name == name:
-                return var
-        return None
+        return self.ledger.months[month].variable.get(name)
 
     def update_static(self, month, name, amount=None, paid=None):
         static = self.ledger.months[month].static
-        for stat in static:
-            if stat.name == name:
-                stat.amount = amount or stat.amount
-                stat.paid = paid if paid is not None else stat.paid
+        stat = static.get(name)
+        if stat is not None:
+            if amount is not None:
+                old = static.set_amount(name, amount)
+                self._amount_changed(month, name, old, amount)
+            stat.paid = paid if paid is not None else stat.paid
+            self._record("update_static", month.ordinal, name, amount, paid)
+            self._changed(month)
 
     def get_static(self, month, name):
-        static = self.ledger.months[month].static
-        for stat in static:
-            if stat.name == name:
-                return stat
-        return None
+        return self.ledger.months[month].static.get(name)
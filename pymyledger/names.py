@@ -0,0 +1,34 @@
+from typing import Dict, Iterable, List
+
+
+class NameTable:
+    """Ledger-wide table of item names.
+
+    Every distinct name is stored once and given a stable integer id, so
+    months that repeat an item share a single string.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        for name in names:
+            self.id_of(name)
+
+    def id_of(self, name) -> int:
+        i = self._ids.get(name)
+        if i is None:
+            i = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return i
+
+    def intern(self, name) -> str:
+        return self._names[self.id_of(name)]
+
+    def name_of(self, i) -> str:
+        return self._names[i]
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
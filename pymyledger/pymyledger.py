@@ -1,12 +1,14 @@
 import logging
+import os
 import signal
 
 from PyQt5 import QtWidgets, QtCore
 
-from .cache import Cache
+from .cache import Cache, SummaryCache
 from .model import Data, Ledger
-from .serialize import Serializer
 from .ui import ApplicationWindow
+from .ui.save_load import save_ledger
+from .ui.tasks import Task
 
 
 logger = logging.getLogger(__name__)
@@ -22,16 +24,18 @@ class PyMyLedger:
         self._qt.setApplicationDisplayName(self._appname)
 
         self.cache = Cache(self._appname)
+        self.summaries = SummaryCache(self._appname)
 
+        self._window: ApplicationWindow = ApplicationWindow(save_ledger)
         last_open = self.cache.get("last_opened")
         if last_open:
-            data = self._load(last_open)
+            # Paint what was last seen of the file, then load it for real
+            summary = self.summaries.get(last_open)
+            if summary is not None:
+                self._window.show_summary(summary)
+            self._load(last_open)
         else:
-            data = None
-
-        save_func = lambda fp, d: Serializer(fp).save(d)
-        self._window: ApplicationWindow = ApplicationWindow(save_func)
-        self._set_data(data)
+            self._set_data(None)
         self._register_signal_handlers()
         self._start_timer()
         self._window.show()
@@ -49,11 +53,30 @@ class PyMyLedger:
             self._window.month_select("Please Select A Month To Start:")
 
     def on_shutdown(self):
+        # Let a save still running finish and report back, then write any
+        # edits whose autosave was still waiting on its timer
+        Task.wait_for_all()
+        self._qt.processEvents()
+        self._window.autosave.flush()
+        Task.wait_for_all()
+        self._qt.processEvents()
         lo = self._window.save_load.last_opened
         if lo:
             logger.info("Caching last file location %s", lo)
             self.cache.update("last_opened", lo)
             self.cache.flush()
+            self._store_summary(lo)
+
+    def _store_summary(self, fp):
+        data = self._window.data
+        if data is None or data.dirty or not os.path.exists(fp):
+            # The file does not hold what is on screen; an older summary
+            # is still checked against the file before it is used
+            return
+        try:
+            self.summaries.put(self._window.summary(fp))
+        except Exception:
+            logger.exception("Could not save summary of %s", fp)
 
     @property
     def default_data(self):
@@ -61,14 +84,15 @@ class PyMyLedger:
         data = Data(Ledger())
         return data
 
-    @staticmethod
-    def _load(fp):
-        try:
-            logger.info("Loading data from %s", fp)
-            return Serializer(fp).load()
-        except Exception:
-            logger.exception("Error loading file %s", fp)
-            return None
+    def _load(self, fp):
+        logger.info("Loading data from %s", fp)
+
+        def failed(message):
+            logger.error("Error loading file %s: %s", fp, message)
+            self.summaries.discard(fp)
+            self._set_data(None)
+
+        self._window.save_load.load(fp, on_failed=failed)
 
     def _register_signal_handlers(self):
         signal.signal(signal.SIGINT, self.sigint_handler)
@@ -1,31 +1,127 @@
-import json
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
 
-from .base import BaseSerializer
+from ..model import Data, LazyMonths, Ledger, NameTable
+from .base import BaseSerializer, SaveStats
+from .journal import JournalStore
+from .sqlite import SqliteStore
 from .v0 import SerializerV0
+from .v1 import MAGIC, SerializerV1
+from .v2 import SerializerV2
+
+
+logger = logging.getLogger(__name__)
 
 
 class Serializer:
-    _latest_verison = 0
+    _latest_verison = 1
 
     _version_map = {
         0: SerializerV0,
+        1: SerializerV1,
+        2: SerializerV2,
     }
 
+    _version_re = re.compile(rb'"version"\s*:\s*(\d+)')
+
     def __init__(self, fp):
         self.fp = fp
 
-    def save(self, data, version=None):
-        v = version or self._latest_verison
-        ser = self._version_map[v]
-        out = ser.serialize_data(data)
-        with open(self.fp, "w") as f:
-            json.dump(out, f)
-
-    def load(self):
-        with open(self.fp, "r") as f:
-            data = json.load(f)
-            version = data.get("version", self._latest_verison)
-            serializer: BaseSerializer = self._version_map.get(version)
-            if serializer is None:
-                raise ValueError("Unsupported version specified:", version)
-            return serializer.deserialize_data(data)
+    @classmethod
+    def latest_version(cls):
+        return cls._latest_verison
+
+    def save(self, data, version=None) -> SaveStats:
+        """Write ``data``, re-encoding only months changed since they were
+        last encoded, and report what the save cost.
+
+        Databases (see ``SqliteStore``) ignore ``version``; for them
+        ``bytes_written`` counts the rows written.
+        """
+        stats = SaveStats()
+        if SqliteStore.handles(self.fp):
+            SqliteStore(self.fp).save(data, stats)
+        else:
+            v = self._latest_verison if version is None else version
+            out = self._serializer(v).encode(data, stats)
+            self._write(out)
+            stats.bytes_written = len(out)
+        months = data.ledger.months
+        if isinstance(months, LazyMonths):
+            # Months that get evicted from now on must be re-read from the
+            # file just written, not from the one the ledger was opened from
+            months.source = self._month_source()
+        data.mark_saved()
+        logger.info(
+            "Saved %s: %d months encoded, %d reused, %d bytes",
+            self.fp,
+            stats.months_encoded,
+            stats.months_reused,
+            stats.bytes_written,
+        )
+        return stats
+
+    def _write(self, out):
+        # Write beside the target and swap it in, so a failed save never
+        # truncates the previous file and existing mappings of it stay valid
+        directory = os.path.dirname(os.path.abspath(self.fp))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(out)
+            os.replace(tmp, self.fp)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def load(self, lazy=False, cache_size=24):
+        """Load the file.
+
+        With ``lazy``, only the month index is read up front; each month is
+        decoded on first access and at most ``cache_size`` clean months
+        are kept in memory. Binary files are memory-mapped, so a month is
+        decoded straight from the mapping without reading the rest
+        (except on Windows, where the file is read whole but still decoded
+        a month at a time).
+        """
+        if SqliteStore.handles(self.fp):
+            return SqliteStore(self.fp).load(lazy=lazy, cache_size=cache_size)
+        if lazy:
+            source = self._month_source()
+            names = NameTable(getattr(source, "names", ()))
+            return Data(Ledger(months=LazyMonths(source, cache_size), names=names))
+        with open(self.fp, "rb") as f:
+            raw = f.read()
+        return self._serializer(self.version_of(raw)).decode(raw)
+
+    def _month_source(self):
+        if SqliteStore.handles(self.fp):
+            return SqliteStore(self.fp).month_source()
+        with open(self.fp, "rb") as f:
+            # Windows cannot replace a file that is still mapped, which
+            # in-place saves do, so the file is read into memory there
+            if f.read(len(MAGIC)) == MAGIC and sys.platform != "win32":
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                f.seek(0)
+                buf = f.read()
+        return self._serializer(self.version_of(buf)).month_source(buf)
+
+    @classmethod
+    def version_of(cls, raw):
+        if raw[: len(MAGIC)] == MAGIC:
+            (version,) = struct.unpack_from("<H", raw, len(MAGIC))
+            return version
+        match = cls._version_re.search(raw)
+        return int(match.group(1)) if match else 0
+
+    def _serializer(self, version) -> BaseSerializer:
+        serializer = self._version_map.get(version)
+        if serializer is None:
+            raise ValueError("Unsupported version specified:", version)
+        return serializer
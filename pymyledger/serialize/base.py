@@ -1,8 +1,69 @@
+from dataclasses import dataclass
+import json
+
+from ..model import Data, Ledger, NameTable
+
+
+@dataclass
+class SaveStats:
+    months_encoded: int = 0
+    months_reused: int = 0
+    bytes_written: int = 0
+
+
 class BaseSerializer:
+    _version = None
+
+    @classmethod
+    def version(cls):
+        return cls._version
+
     @classmethod
     def serialize_data(cls, data):
         raise NotImplementedError
 
     @classmethod
-    def deserialize_data(cls, json):
+    def deserialize_data(cls, doc):
+        raise NotImplementedError
+
+    @classmethod
+    def encode(cls, data, stats: SaveStats = None) -> bytes:
+        if stats is not None:
+            stats.months_encoded += len(data.ledger.months)
+        return json.dumps(cls.serialize_data(data)).encode("utf-8")
+
+    @classmethod
+    def month_fragment(cls, data, month, encode, stats: SaveStats = None, raw=None):
+        # pylint: disable=R0913
+        """The encoded form of one month, re-encoded only if it changed.
+
+        ``raw`` returns the month's bytes straight from the file the ledger
+        was opened from, if that is in this format; it is only used for
+        months not edited since.
+        """
+        fragment = data.cached_fragment(month, cls._version)
+        if fragment is None and raw is not None and month not in data.dirty:
+            fragment = raw(month)
+        if fragment is None:
+            fragment = encode(data.ledger.months[month])
+            data.cache_fragment(month, cls._version, fragment)
+            if stats is not None:
+                stats.months_encoded += 1
+        elif stats is not None:
+            stats.months_reused += 1
+        return fragment
+
+    @classmethod
+    def decode(cls, raw):
+        return cls.deserialize_data(json.loads(raw))
+
+    @classmethod
+    def month_source(cls, raw):
+        """A source of months for LazyMonths, read from the raw file bytes."""
         raise NotImplementedError
+
+    @classmethod
+    def decode_all(cls, source):
+        """Every month of a month source, decoded up front."""
+        months = {month: source.load(month) for month in source.keys()}
+        return Data(Ledger(months=months, names=NameTable(source.names)))
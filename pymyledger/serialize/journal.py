@@ -0,0 +1,141 @@
+import json
+import logging
+import os
+import threading
+
+from ..model import Data, Ledger
+
+
+logger = logging.getLogger(__name__)
+
+
+class JournalStore:
+    """A ledger file plus an append-only log of the edits made since.
+
+    The base snapshot is the ordinary ledger file ``serializer`` reads and
+    writes, at ``fp``. Edits recorded in ``Data.journal`` are appended to
+    ``<fp>.journal``, one JSON array per line, so a save costs the size of
+    the edits. Loading replays the log over the snapshot.
+
+    Once the log grows past ``compact_threshold`` bytes it is sealed
+    (renamed to ``<fp>.journal.sealed``) and a background thread folds it
+    into a fresh snapshot. New edits go to a new log in the meantime.
+
+    A journaled save clears ``Data.dirty`` but leaves the edited months
+    pinned, since the base snapshot the ledger reads evicted months from
+    does not have the edits. The store remembers those months and
+    re-encodes them on the next full snapshot.
+    """
+
+    compact_threshold = 256 * 1024
+
+    def __init__(self, serializer, compact_threshold=None):
+        self.fp = serializer.fp
+        self.serializer = serializer
+        if compact_threshold is not None:
+            self.compact_threshold = compact_threshold
+        self._compacting = threading.Lock()
+        self._compaction = None
+        # Months whose edits are only in the logs, not in the base
+        self._journaled = set()
+
+    @property
+    def journal_fp(self):
+        return self.fp + ".journal"
+
+    @property
+    def sealed_fp(self):
+        return self.fp + ".journal.sealed"
+
+    def load(self, lazy=False, cache_size=24):
+        if os.path.exists(self.fp):
+            data = self.serializer.load(lazy=lazy, cache_size=cache_size)
+        else:
+            data = Data(Ledger())
+        for path in (self.sealed_fp, self.journal_fp):
+            self._replay(data, path)
+        data.journal = []
+        self._journaled = set()
+        return data
+
+    def save(self, data: Data):
+        if data.journal is None or not os.path.exists(self.fp):
+            self.save_snapshot(data)
+            return
+        entries = data.journal
+        if entries:
+            with open(self.journal_fp, "a") as f:
+                f.writelines(json.dumps(e) + "\n" for e in entries)
+                f.flush()
+                os.fsync(f.fileno())
+            del entries[:]
+        self._journaled |= data.dirty
+        data.dirty.clear()
+        journal_fp, threshold = self.journal_fp, self.compact_threshold
+        if os.path.exists(journal_fp) and os.path.getsize(journal_fp) > threshold:
+            self.compact_in_background()
+
+    def save_snapshot(self, data: Data):
+        """Write all of ``data`` as the base and drop the logs."""
+        self.wait()
+        data.dirty |= self._journaled
+        self.serializer.save(data)
+        self._journaled = set()
+        for path in (self.sealed_fp, self.journal_fp):
+            if os.path.exists(path):
+                os.remove(path)
+        data.journal = []
+
+    def compact_in_background(self):
+        if not self._compacting.acquire(blocking=False):
+            return
+        try:
+            if not os.path.exists(self.sealed_fp):
+                os.replace(self.journal_fp, self.sealed_fp)
+        except BaseException:
+            self._compacting.release()
+            raise
+        self._compaction = threading.Thread(
+            target=self._compact, name="journal-compaction", daemon=True
+        )
+        self._compaction.start()
+
+    def wait(self):
+        """Block until a running compaction has finished."""
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join()
+
+    def _compact(self):
+        try:
+            logger.info("Compacting %s into %s", self.sealed_fp, self.fp)
+            data = self.serializer.load()
+            self._replay(data, self.sealed_fp)
+            self.serializer.save(data)
+            # Replaying the sealed log again after a crash right here is
+            # harmless: every entry sets a value or is skipped if present
+            os.remove(self.sealed_fp)
+        except Exception:
+            logger.exception("Journal compaction failed")
+        finally:
+            self._compaction = None
+            self._compacting.release()
+
+    @staticmethod
+    def _replay(data: Data, path):
+        if not os.path.exists(path):
+            return
+        with open(path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final line from an interrupted append
+                    logger.warning("Skipping unreadable journal line in %s", path)
+                    continue
+                try:
+                    data.replay(entry)
+                except (KeyError, ValueError):
+                    logger.debug("Skipping journal entry %s", entry)
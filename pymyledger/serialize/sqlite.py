@@ -0,0 +1,228 @@
+from contextlib import closing
+import os
+import sqlite3
+import threading
+
+from .base import SaveStats
+from ..model import (
+    Data,
+    ItemSeries,
+    LazyMonths,
+    Ledger,
+    MonthBudget,
+    MonthKey,
+    NameTable,
+    StaticLineItem,
+    VariableLineItem,
+)
+
+EXTENSION = ".pmldb"
+HEADER = b"SQLite format 3\x00"
+
+STATIC = 0
+VARIABLE = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS months (
+    month INTEGER PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS items (
+    month INTEGER NOT NULL REFERENCES months (month),
+    kind INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    amount NUMERIC NOT NULL,
+    paid INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (month, kind, name)
+);
+CREATE INDEX IF NOT EXISTS items_month ON items (month, kind, position);
+CREATE INDEX IF NOT EXISTS items_name ON items (name, month);
+"""
+
+UPSERT_ITEM = """
+INSERT INTO items (month, kind, position, name, amount, paid)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (month, kind, name) DO UPDATE SET
+    position = excluded.position,
+    amount = excluded.amount,
+    paid = excluded.paid
+"""
+
+
+class SqliteStore:
+    """A ledger kept in an SQLite database instead of a single file.
+
+    Months are keyed by ordinal; every line item is one row of ``items``.
+    A save upserts only the rows of months changed since the ledger was
+    read from (or last saved to) the same database, in one transaction.
+    Anything else is written out in full.
+    """
+
+    def __init__(self, fp):
+        self.fp = fp
+
+    @classmethod
+    def handles(cls, fp):
+        """Whether ``fp`` names a database rather than a ledger file."""
+        if fp.endswith(EXTENSION):
+            return True
+        try:
+            with open(fp, "rb") as f:
+                return f.read(len(HEADER)) == HEADER
+        except OSError:
+            return False
+
+    def connect(self, check_same_thread=True):
+        conn = sqlite3.connect(self.fp, check_same_thread=check_same_thread)
+        conn.executescript(SCHEMA)
+        return conn
+
+    def save(self, data: Data, stats: SaveStats = None) -> SaveStats:
+        stats = SaveStats() if stats is None else stats
+        ledger = data.ledger
+        incremental = self._is_source_of(ledger)
+        months = ledger.sorted_months
+        if incremental:
+            months = [m for m in months if m in data.dirty]
+        with closing(self.connect()) as conn:
+            with conn:
+                if not incremental:
+                    conn.execute("DELETE FROM items")
+                    conn.execute("DELETE FROM months")
+                for month in months:
+                    stats.bytes_written += self._write_month(
+                        conn, month, ledger.months[month]
+                    )
+                    stats.months_encoded += 1
+        stats.months_reused = len(ledger.months) - stats.months_encoded
+        return stats
+
+    def _is_source_of(self, ledger):
+        source = getattr(ledger.months, "source", None)
+        if not isinstance(source, SqliteMonthSource) or not os.path.exists(self.fp):
+            return False
+        return os.path.samefile(source.fp, self.fp)
+
+    @staticmethod
+    def _write_month(conn, month, budget):
+        conn.execute(
+            "INSERT OR IGNORE INTO months (month) VALUES (?)", (month.ordinal,)
+        )
+        static, variable = budget.static, budget.variable
+        rows = [
+            (month.ordinal, STATIC, i, name, amount, int(paid))
+            for i, (name, amount, paid) in enumerate(
+                zip(static.names(), static.amounts(), static.paid_flags())
+            )
+        ]
+        rows += [
+            (month.ordinal, VARIABLE, i, name, amount, 0)
+            for i, (name, amount) in enumerate(
+                zip(variable.names(), variable.amounts())
+            )
+        ]
+        conn.executemany(UPSERT_ITEM, rows)
+        return len(rows)
+
+    def load(self, lazy=False, cache_size=24):
+        source = self.month_source()
+        names = NameTable(source.names)
+        if lazy:
+            return Data(Ledger(months=LazyMonths(source, cache_size), names=names))
+        months = source.load_all()
+        source.close()
+        return Data(Ledger(months=months, names=names))
+
+    def month_source(self):
+        return SqliteMonthSource(self.fp, self.connect(check_same_thread=False))
+
+    def item_series(self, name) -> ItemSeries:
+        """The amounts of ``name`` per month, summed over both kinds."""
+        with closing(self.connect()) as conn:
+            rows = conn.execute(
+                "SELECT month, SUM(amount) FROM items WHERE name = ?"
+                " GROUP BY month ORDER BY month",
+                (name,),
+            ).fetchall()
+        return ItemSeries(
+            name,
+            [MonthKey.from_ordinal(month) for month, _ in rows],
+            [amount for _, amount in rows],
+        )
+
+    def yearly_totals(self, kind=None):
+        """``(year, assets, liabilities)`` per year, in ascending order."""
+        query = (
+            "SELECT month / 12 AS year,"
+            " TOTAL(CASE WHEN amount > 0 THEN amount END),"
+            " TOTAL(CASE WHEN amount < 0 THEN -amount END)"
+            " FROM items %s GROUP BY year ORDER BY year"
+        )
+        with closing(self.connect()) as conn:
+            if kind is None:
+                return conn.execute(query % "").fetchall()
+            return conn.execute(query % "WHERE kind = ?", (kind,)).fetchall()
+
+
+class SqliteMonthSource:
+    """Months of a database, read one month's rows at a time.
+
+    The connection is shared with whatever thread holds a snapshot of the
+    ledger, so queries are serialized by a lock.
+    """
+
+    def __init__(self, fp, conn):
+        self.fp = fp
+        self._conn = conn
+        self._lock = threading.Lock()
+        with self._lock:
+            self._months = [
+                MonthKey.from_ordinal(month)
+                for (month,) in conn.execute("SELECT month FROM months ORDER BY month")
+            ]
+            self.names = [
+                name
+                for (name,) in conn.execute(
+                    "SELECT name FROM items GROUP BY name ORDER BY MIN(rowid)"
+                )
+            ]
+
+    def keys(self):
+        return self._months
+
+    def load(self, month):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, name, amount, paid FROM items WHERE month = ?"
+                " ORDER BY kind, position",
+                (month.ordinal,),
+            ).fetchall()
+        return self._budget(rows)
+
+    def load_all(self):
+        months = {month: MonthBudget() for month in self._months}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT month, kind, name, amount, paid FROM items"
+                " ORDER BY month, kind, position"
+            )
+            by_month = {}
+            for month, *row in rows:
+                by_month.setdefault(month, []).append(row)
+        for ordinal, month_rows in by_month.items():
+            months[MonthKey.from_ordinal(ordinal)] = self._budget(month_rows)
+        return months
+
+    @staticmethod
+    def _budget(rows):
+        budget = MonthBudget()
+        for kind, name, amount, paid in rows:
+            if kind == STATIC:
+                budget.static.append(StaticLineItem(name, amount, bool(paid)))
+            else:
+                budget.variable.append(VariableLineItem(name, amount))
+        budget.pack()
+        return budget
+
+    def close(self):
+        self._conn.close()
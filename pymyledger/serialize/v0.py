@@ -1,3 +1,6 @@
+import json
+import re
+
 from .base import BaseSerializer
 
 from ..model import (
@@ -21,6 +24,34 @@ class SerializerV0(BaseSerializer):
             "ledger": cls.serialize_ledger(data.ledger),
         }
 
+    @classmethod
+    def encode(cls, data, stats=None):
+        # Same document as serialize_data, assembled from per-month fragments
+        source = getattr(data.ledger.months, "source", None)
+        raw = source.raw if getattr(source, "version", None) == cls._version else None
+        months = b", ".join(
+            cls.month_entry(
+                k, cls.month_fragment(data, k, cls.encode_month, stats, raw)
+            )
+            for k in data.ledger.sorted_months
+        )
+        return cls.document_head() + months + cls.document_tail
+
+    document_tail = b"}}}"
+
+    @classmethod
+    def document_head(cls):
+        head = json.dumps({"application": "PyMyLedger", "version": cls._version})
+        return b'%s, "ledger": {"months": {' % head[:-1].encode()
+
+    @classmethod
+    def month_entry(cls, month_key, fragment):
+        return b'"%s": %s' % (cls.serialize_month_key(month_key).encode(), fragment)
+
+    @classmethod
+    def encode_month(cls, month):
+        return json.dumps(cls.serialize_month_budget(month)).encode("utf-8")
+
     @classmethod
     def serialize_ledger(cls, ledger):
         return {
@@ -50,8 +81,8 @@ class SerializerV0(BaseSerializer):
         return {"name": static.name, "amount": static.amount, "paid": static.paid}
 
     @classmethod
-    def deserialize_data(cls, json):
-        months = json["ledger"]["months"]
+    def deserialize_data(cls, doc):
+        months = doc["ledger"]["months"]
         return Data(
             Ledger(
                 months={
@@ -61,6 +92,10 @@ class SerializerV0(BaseSerializer):
             )
         )
 
+    @classmethod
+    def month_source(cls, raw):
+        return JsonMonthSource(str(raw, "utf-8"), cls)
+
     @classmethod
     def deserialize_month_key(cls, month_key):
         y, m = month_key.split("-")
@@ -74,3 +109,54 @@ class SerializerV0(BaseSerializer):
             [StaticLineItem(s["name"], s["amount"], s["paid"]) for s in st],
             [VariableLineItem(v["name"], v["amount"]) for v in vr],
         )
+
+
+class JsonMonthSource:
+    """Locates each month in v0 JSON text without decoding it.
+
+    Month keys are the only ``"<year>-<month>": {`` pairs in the document
+    (a quote inside an item name is always escaped), so a single regex
+    pass finds where every month's object starts. The object itself is
+    decoded with ``raw_decode`` when the month is first requested.
+    """
+
+    _month_re = re.compile(r'"(\d+)-(\d+)"\s*:\s*(?=\{)')
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, text, serializer):
+        self._text = text
+        self._serializer = serializer
+        self.version = serializer.version()
+        self._offsets = {
+            MonthKey(int(m.group(1)), int(m.group(2))): m.end()
+            for m in self._month_re.finditer(text)
+        }
+        # Where each month's object ends, once it has been decoded
+        self._ends = {}
+
+    def keys(self):
+        return self._offsets.keys()
+
+    def raw(self, month):
+        start = self._offsets[month]
+        end = self._ends.get(month)
+        if end is None:
+            _, end = self._decoder.raw_decode(self._text, start)
+            self._ends[month] = end
+        return self._text[start:end].encode("utf-8")
+
+    def load(self, month):
+        obj, end = self._decoder.raw_decode(self._text, self._offsets[month])
+        self._ends[month] = end
+        return self._serializer.deserialize_month(obj)
+
+    @classmethod
+    def next_month(cls, text, pos=0):
+        """The first month in ``text`` at or after ``pos``, as its key, its
+        decoded object and the offset just past it; None if there is no
+        month key. Raises ValueError if the object is cut off."""
+        match = cls._month_re.search(text, pos)
+        if match is None:
+            return None
+        obj, end = cls._decoder.raw_decode(text, match.end())
+        return MonthKey(int(match.group(1)), int(match.group(2))), obj, end
@@ -0,0 +1,247 @@
+from array import array
+import struct
+import sys
+
+from .base import BaseSerializer
+
+from ..model import (
+    MonthBudget,
+    MonthKey,
+    NameTable,
+    PackedLineItems,
+    StaticLineItem,
+    VariableLineItem,
+)
+
+
+MAGIC = b"PMLB"
+
+
+class SerializerV1(BaseSerializer):
+    """Compact binary format.
+
+    All integers are little-endian::
+
+        header     magic "PMLB", uint16 version
+        months     one block per month, see encode_month
+        strings    uint32 count, then uint32 length + UTF-8 bytes per name
+        directory  uint32 count, then int32 ordinal, uint64 offset,
+                   uint32 length per month, in ascending month order
+        trailer    uint64 strings offset, uint64 directory offset
+
+    Item names are stored once in the string table and referenced by id.
+    The directory and string table come last so a file can be written in
+    a single forward pass.
+    """
+
+    _version = 1
+
+    header = struct.Struct("<4sH")
+    trailer = struct.Struct("<QQ")
+    dir_entry = struct.Struct("<iQI")
+    block_header = struct.Struct("<II2s")
+    count = struct.Struct("<I")
+
+    @classmethod
+    def serialize_data(cls, data):
+        return cls.encode(data)
+
+    @classmethod
+    def deserialize_data(cls, doc):
+        return cls.decode(doc)
+
+    @classmethod
+    def encode(cls, data, stats=None):
+        ledger = data.ledger
+        out = bytearray(cls.header.pack(MAGIC, cls._version))
+        directory = []
+        source = getattr(ledger.months, "source", None)
+        raw = source.raw if getattr(source, "version", None) == cls._version else None
+        for month in ledger.sorted_months:
+            block = cls.month_fragment(
+                data, month, lambda m: cls.encode_month(m, ledger.names), stats, raw
+            )
+            directory.append((month.ordinal, len(out), len(block)))
+            out += block
+        cls.write_index(out, ledger.names, directory)
+        return bytes(out)
+
+    @classmethod
+    def write_index(cls, out, names, directory, offset=0):
+        """Append the string table, directory and trailer to ``out``, which
+        starts ``offset`` bytes into the file."""
+        out += cls.trailer.pack(*cls.write_tables(out, names, directory, offset))
+
+    @classmethod
+    def write_tables(cls, out, names, directory, offset):
+        """Append the string table and directory to ``out`` and return
+        their offsets in the file."""
+        strings_offset = offset + len(out)
+        out += cls.encode_strings(names)
+        directory_offset = offset + len(out)
+        out += cls.count.pack(len(directory))
+        for entry in directory:
+            out += cls.dir_entry.pack(*entry)
+        return strings_offset, directory_offset
+
+    @classmethod
+    def encode_strings(cls, names):
+        out = bytearray(cls.count.pack(len(names)))
+        for name in names:
+            encoded = name.encode("utf-8")
+            out += cls.count.pack(len(encoded))
+            out += encoded
+        return out
+
+    @classmethod
+    def encode_month(cls, month, names: NameTable):
+        """uint32 static count, uint32 variable count, one amount typecode
+        ("q" or "d") per kind, then for static items name ids, amounts and
+        paid flags, and for variable items name ids and amounts."""
+        static_amounts = cls._amount_column(month.static.amounts())
+        variable_amounts = cls._amount_column(month.variable.amounts())
+        typecodes = (static_amounts.typecode + variable_amounts.typecode).encode()
+        out = bytearray(
+            cls.block_header.pack(len(month.static), len(month.variable), typecodes)
+        )
+        out += cls._le(array("I", (names.id_of(n) for n in month.static.names())))
+        out += cls._le(static_amounts)
+        out += month.static.paid_flags()
+        out += cls._le(array("I", (names.id_of(n) for n in month.variable.names())))
+        out += cls._le(variable_amounts)
+        return out
+
+    @staticmethod
+    def _amount_column(amounts):
+        if isinstance(amounts, array):
+            return amounts
+        try:
+            return array("q", amounts)
+        except TypeError:
+            return array("d", amounts)
+
+    @staticmethod
+    def _le(column):
+        if sys.byteorder == "big":
+            column = array(column.typecode, column)
+            column.byteswap()
+        return column.tobytes()
+
+    @classmethod
+    def decode(cls, raw):
+        return cls.decode_all(cls.month_source(raw))
+
+    @classmethod
+    def month_source(cls, raw):
+        return BinaryMonthSource(raw, cls)
+
+    @classmethod
+    def read_index(cls, buf):
+        cls.check_header(buf)
+        strings_offset, directory_offset = cls.trailer.unpack_from(
+            buf, len(buf) - cls.trailer.size
+        )
+        directory = {
+            MonthKey.from_ordinal(ordinal): (offset, length)
+            for ordinal, offset, length in cls.read_table(
+                buf, directory_offset, cls.dir_entry
+            )
+        }
+        return cls.read_strings(buf, strings_offset), directory
+
+    @classmethod
+    def check_header(cls, buf):
+        magic, version = cls.header.unpack_from(buf, 0)
+        if magic != MAGIC or version != cls._version:
+            raise ValueError("Not a v%d ledger file" % cls._version)
+
+    @classmethod
+    def read_table(cls, buf, offset, entry):
+        """The ``entry`` records of the counted table at ``offset``."""
+        (n,) = cls.count.unpack_from(buf, offset)
+        start = offset + cls.count.size
+        return entry.iter_unpack(buf[start : start + n * entry.size])
+
+    @classmethod
+    def read_strings(cls, buf, offset):
+        names = []
+        (n,) = cls.count.unpack_from(buf, offset)
+        pos = offset + cls.count.size
+        for _ in range(n):
+            (length,) = cls.count.unpack_from(buf, pos)
+            pos += cls.count.size
+            names.append(str(buf[pos : pos + length], "utf-8"))
+            pos += length
+        return names
+
+    @classmethod
+    def decode_month(cls, buf, offset, names, names_cache):
+        n_static, n_variable, typecodes = cls.block_header.unpack_from(buf, offset)
+        pos = offset + cls.block_header.size
+        static_tc, variable_tc = typecodes.decode()
+
+        def column(typecode, n):
+            nonlocal pos
+            col = array(typecode)
+            col.frombytes(buf[pos : pos + n * col.itemsize])
+            pos += n * col.itemsize
+            if sys.byteorder == "big":
+                col.byteswap()
+            return col
+
+        def name_columns(n):
+            nonlocal pos
+            key = bytes(buf[pos : pos + 4 * n])
+            pos += 4 * n
+            # Carried-forward months repeat the same names; share the lists
+            cached = names_cache.get(key)
+            if cached is None:
+                ids = array("I")
+                ids.frombytes(key)
+                if sys.byteorder == "big":
+                    ids.byteswap()
+                column_names = [names[i] for i in ids]
+                index = {name: i for i, name in enumerate(column_names)}
+                cached = names_cache[key] = (column_names, index)
+            return cached
+
+        # Arguments are evaluated in order, so the columns are read in order
+        static = PackedLineItems.from_columns(
+            StaticLineItem,
+            name_columns(n_static),
+            column(static_tc, n_static),
+            bytearray(buf[pos : pos + n_static]),
+        )
+        pos += n_static
+        variable = PackedLineItems.from_columns(
+            VariableLineItem, name_columns(n_variable), column(variable_tc, n_variable)
+        )
+        return MonthBudget(static, variable)
+
+
+class BinaryMonthSource:
+    """Months of a v1 file, decoded one block at a time.
+
+    ``buf`` may be bytes or an mmap; only the string table and directory
+    are read when the source is created.
+    """
+
+    def __init__(self, buf, serializer):
+        self._buf = memoryview(buf)
+        self._serializer = serializer
+        self.version = serializer.version()
+        self.names, self._directory = serializer.read_index(buf)
+        self._names_cache = {}
+
+    def keys(self):
+        return self._directory.keys()
+
+    def raw(self, month):
+        offset, length = self._directory[month]
+        return self._buf[offset : offset + length]
+
+    def load(self, month):
+        offset, _ = self._directory[month]
+        return self._serializer.decode_month(
+            self._buf, offset, self.names, self._names_cache
+        )
@@ -0,0 +1,199 @@
+from collections import OrderedDict
+import datetime
+import itertools
+import struct
+import threading
+import zlib
+
+from .v1 import MAGIC, BinaryMonthSource, SerializerV1
+
+from ..model import MonthKey
+
+
+UNCOMPRESSED = 0xFFFFFFFF
+
+
+class SerializerV2(SerializerV1):
+    """v1 with the months of each closed year compressed together.
+
+    Laid out like v1, except::
+
+        months     v1 month blocks for open years; one zlib stream of
+                   the year's concatenated v1 blocks per closed year
+        directory  uint32 count, then int32 ordinal, uint64 offset,
+                   uint32 length, uint32 chunk per month; the offset is
+                   into the decompressed chunk unless chunk is 0xFFFFFFFF
+        chunks     uint32 count, then uint64 offset, uint32 length per
+                   compressed year
+        trailer    uint64 strings, directory and chunks offsets
+
+    Years before the current one are closed. A closed year that has no
+    unsaved changes is copied from the file it was read from still
+    compressed.
+    """
+
+    _version = 2
+
+    trailer = struct.Struct("<QQQ")
+    dir_entry = struct.Struct("<iQII")
+    chunk_entry = struct.Struct("<QI")
+
+    compression_level = 6
+
+    @classmethod
+    def open_year(cls):
+        """The first year written uncompressed."""
+        return datetime.date.today().year
+
+    @classmethod
+    def encode(cls, data, stats=None):
+        directory = []
+        chunks = []
+        ledger = data.ledger
+        out = bytearray(cls.header.pack(MAGIC, cls._version))
+        source = getattr(ledger.months, "source", None)
+        if getattr(source, "version", None) != cls._version:
+            source = None
+
+        def fragment(month):
+            return cls.month_fragment(
+                data,
+                month,
+                lambda m: cls.encode_month(m, ledger.names),
+                stats,
+                source.raw if source is not None else None,
+            )
+
+        by_year = itertools.groupby(ledger.sorted_months, key=lambda m: m.year)
+        for year, months in by_year:
+            months = list(months)
+            if year >= cls.open_year():
+                for month in months:
+                    block = fragment(month)
+                    directory.append(
+                        (month.ordinal, len(out), len(block), UNCOMPRESSED)
+                    )
+                    out += block
+                continue
+            chunk = None
+            if source is not None and not any(m in data.dirty for m in months):
+                chunk = source.chunk(months)
+            if chunk is None:
+                chunk = cls._compress_year(months, fragment)
+            elif stats is not None:
+                stats.months_reused += len(months)
+            directory += [entry + (len(chunks),) for entry in chunk[1]]
+            chunks.append((len(out), len(chunk[0])))
+            out += chunk[0]
+        cls.write_chunked_index(out, ledger.names, directory, chunks)
+        return bytes(out)
+
+    @classmethod
+    def _compress_year(cls, months, fragment):
+        """One compressed chunk of ``months`` and its directory entries."""
+        plain = bytearray()
+        entries = []
+        for month in months:
+            block = fragment(month)
+            entries.append((month.ordinal, len(plain), len(block)))
+            plain += block
+        return zlib.compress(plain, cls.compression_level), entries
+
+    @classmethod
+    def write_index(cls, out, names, directory, offset=0):
+        """The index of a file whose months are all uncompressed."""
+        cls.write_chunked_index(out, names, directory, (), offset)
+
+    @classmethod
+    def write_chunked_index(cls, out, names, directory, chunks, offset=0):
+        # pylint: disable=R0913
+        """Append the string table, directory, chunk table and trailer to
+        ``out``, which starts ``offset`` bytes into the file."""
+        tables = cls.write_tables(out, names, directory, offset)
+        chunks_offset = offset + len(out)
+        out += cls.count.pack(len(chunks))
+        for entry in chunks:
+            out += cls.chunk_entry.pack(*entry)
+        out += cls.trailer.pack(*tables, chunks_offset)
+
+    @classmethod
+    def month_source(cls, raw):
+        return CompressedMonthSource(raw, cls)
+
+    @classmethod
+    def read_index(cls, buf):
+        cls.check_header(buf)
+        strings_offset, directory_offset, chunks_offset = cls.trailer.unpack_from(
+            buf, len(buf) - cls.trailer.size
+        )
+        return (
+            cls.read_strings(buf, strings_offset),
+            list(cls.read_table(buf, directory_offset, cls.dir_entry)),
+            list(cls.read_table(buf, chunks_offset, cls.chunk_entry)),
+        )
+
+
+class CompressedMonthSource(BinaryMonthSource):  # pylint: disable=R0902
+    """Months of a v2 file; a closed year is decompressed when one of its
+    months is first read, and the few most recent years are kept."""
+
+    chunk_cache_size = 2
+
+    def __init__(self, buf, serializer):  # pylint: disable=W0231
+        self._buf = memoryview(buf)
+        self._serializer = serializer
+        self.version = serializer.version()
+        self.names, directory, self._chunks = serializer.read_index(buf)
+        self._directory = {}
+        self._chunk_months = {}
+        for ordinal, offset, length, chunk in directory:
+            month = MonthKey.from_ordinal(ordinal)
+            self._directory[month] = (offset, length, chunk)
+            if chunk != UNCOMPRESSED:
+                self._chunk_months.setdefault(chunk, []).append(
+                    (ordinal, offset, length)
+                )
+        self._names_cache = {}
+        self._decompressed = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _block_buffer(self, month):
+        offset, length, chunk = self._directory[month]
+        if chunk == UNCOMPRESSED:
+            return self._buf, offset, length
+        # A save on a worker thread reads through the same source
+        with self._lock:
+            plain = self._decompressed.get(chunk)
+            if plain is None:
+                chunk_offset, chunk_length = self._chunks[chunk]
+                plain = zlib.decompress(
+                    self._buf[chunk_offset : chunk_offset + chunk_length]
+                )
+                self._decompressed[chunk] = plain
+                while len(self._decompressed) > self.chunk_cache_size:
+                    self._decompressed.popitem(last=False)
+            else:
+                self._decompressed.move_to_end(chunk)
+        return memoryview(plain), offset, length
+
+    def raw(self, month):
+        buf, offset, length = self._block_buffer(month)
+        return buf[offset : offset + length]
+
+    def load(self, month):
+        buf, offset, _ = self._block_buffer(month)
+        return self._serializer.decode_month(buf, offset, self.names, self._names_cache)
+
+    def chunk(self, months):
+        """The compressed bytes and directory entries of ``months``, if they
+        are stored as exactly one chunk."""
+        if not months:
+            return None
+        _, _, chunk = self._directory.get(months[0], (None, None, UNCOMPRESSED))
+        if chunk == UNCOMPRESSED:
+            return None
+        entries = self._chunk_months[chunk]
+        if [ordinal for ordinal, _, _ in entries] != [m.ordinal for m in months]:
+            return None
+        offset, length = self._chunks[chunk]
+        return self._buf[offset : offset + length], entries
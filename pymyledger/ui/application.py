@@ -1,24 +1,24 @@
-from datetime import datetime
 import logging
 
-from PyQt5 import QtWidgets
-from PyQt5.QtCore import Qt
+from PyQt5 import QtCore, QtWidgets
 
-from ..model import (
-    Data,
-    MonthKey,
-)
+from ..cache import Summary
+from ..model import Data, Ledger, MonthBudget, MonthKey
 from .gen.ui_pyledger import Ui_PyLedger
+from .autosave import Autosave
+from .charts import ChartsPanel
+from .month_selector import MonthSelector
 from .month_window import MonthWindow
 from .save_load import SaveLoad
 from .static_window import StaticWindow
+from .table_models import StaticItemsModel, VariableItemsModel
 from .variable_window import VariableWindow
 
 
 logger = logging.getLogger(__name__)
 
 
-class ApplicationWindow(QtWidgets.QMainWindow):
+class ApplicationWindow(QtWidgets.QMainWindow):  # pylint: disable=R0902
     _window_title = "PyMyLedger"
 
     def __init__(self, save_func):
@@ -32,26 +32,78 @@ class ApplicationWindow(QtWidgets.QMainWindow):
         self._set_window_title()
 
         self.save_load = SaveLoad(self, save_func)
+        self.autosave = Autosave(self, self.save_load)
 
         self.ui.new_month.clicked.connect(self._on_new_month_press)
         self.ui.add_static.clicked.connect(self._on_new_static_press)
         self.ui.add_variable.clicked.connect(self._on_new_variable_press)
 
-        self.static_table = StaticTableManager(
-            self.ui.static_table, self._on_static_check_state_change
-        )
-        self.variable_table = VariableTableManager(self.ui.variable_table)
+        self.static_model = StaticItemsModel(self)
+        self.variable_model = VariableItemsModel(self)
+        self._show_items(self.ui.static_table, self.static_model)
+        self._show_items(self.ui.variable_table, self.variable_model)
+
+        self.charts = ChartsPanel(self)
+        self.addDockWidget(QtCore.Qt.BottomDockWidgetArea, self.charts)
+        self.charts.hide()
+        self.ui.menuLedger.addAction(self.charts.toggleViewAction())
 
-        self.ui.month_select.currentTextChanged.connect(self._load_month)
+        self.month_selector = MonthSelector(self.ui.month_select, self)
+        self.month_selector.changed.connect(self._load_month)
 
-        self.ui.static_table.cellChanged.connect(self._on_static_cell_change)
-        self.ui.variable_table.cellChanged.connect(self._on_variable_cell_change)
+        # Nothing can be edited until there is data to edit
+        self._editable = False
+        self._set_editable(False)
+
+    def _show_items(self, view, model):
+        view.setModel(model)
+        view.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
+        model.edit_failed.connect(self.error_message)
+        model.edited.connect(self._on_item_change)
 
     def set_data(self, data=None):
+        if data is not None and self.data is not None and data is not self.data:
+            self.data.remove_listener(self.autosave.schedule)
         self.data: Data = data or self.data
-        self._populate_month_select()
+        self.data.add_listener(self.autosave.schedule)
+        if self.charts.data is not self.data:
+            self.charts.set_data(self.data)
+        self.month_selector.set_months(
+            self.data.months_available, self.month_selector.current
+        )
         self._set_window_title()
         self._load_month()
+        self._set_editable(True)
+
+    def show_summary(self, summary: Summary):
+        """Paint a file's cached summary while the file itself loads."""
+        logger.debug("Showing summary of %s", summary.path)
+        month = summary.month_key
+        blocker = QtCore.QSignalBlocker(self.month_selector)
+        self.month_selector.set_months(summary.month_keys, month)
+        blocker.unblock()
+        if month is not None:
+            # A stand-in ledger holding just the summarized month
+            data = Data(Ledger(months={month: MonthBudget(*summary.items)}))
+            self.static_model.set_month(data, month)
+            self.variable_model.set_month(data, month)
+        self._show_balance(summary.assets, summary.liabilities)
+
+    def summary(self, fp) -> Summary:
+        """Summary of ``fp``, which must hold the current data as saved."""
+        return Summary.of(fp, self.data, self._current_month)
+
+    def _set_editable(self, editable):
+        self._editable = editable
+        for widget in (self.ui.new_month, self.ui.static_table, self.ui.variable_table):
+            widget.setEnabled(editable)
+        self._enable_adding()
+
+    def _enable_adding(self):
+        # Items are added to the selected month, so there has to be one
+        can_add = self._editable and self._current_month is not None
+        self.ui.add_static.setEnabled(can_add)
+        self.ui.add_variable.setEnabled(can_add)
 
     def _set_window_title(self):
         if self.data:
@@ -62,26 +114,31 @@ class ApplicationWindow(QtWidgets.QMainWindow):
 
     @property
     def _current_month(self):
-        current_month_display = self.ui.month_select.currentText()
-        if current_month_display:
-            key = MonthKey.from_date(self._month_display_as_date(current_month_display))
-            return key
-        return None
-
-    @staticmethod
-    def _month_display_as_date(month_display):
-        return datetime.strptime(month_display, MonthKey.month_format()).date()
+        return self.month_selector.current
 
     def _load_month(self, *args):
+        month_key = self._current_month
+        self.static_model.set_month(self.data, month_key)
+        self.variable_model.set_month(self.data, month_key)
+        self._enable_adding()
+        if month_key:
+            self._balance_calculations(month_key)
+
+    def _refresh_month(self):
+        """Update the tables in place after items were added or changed."""
+        self.static_model.refresh()
+        self.variable_model.refresh()
+        self._on_item_change()
+
+    def _on_item_change(self, *args):
         month_key = self._current_month
         if month_key:
-            static, variable = self.data.static_and_variable(month_key)
-            self.variable_table.add_items(variable)
-            self.static_table.add_items(static)
             self._balance_calculations(month_key)
 
     def _balance_calculations(self, month):
-        assets, liabilities = self.data.assets_and_liabilities(month)
+        self._show_balance(*self.data.assets_and_liabilities(month))
+
+    def _show_balance(self, assets, liabilities):
         balance = assets - liabilities
         self.ui.assets_text.setText(str(assets))
         self.ui.liabilities_text.setText(str(liabilities))
@@ -99,22 +156,7 @@ class ApplicationWindow(QtWidgets.QMainWindow):
         month_key = MonthKey.from_date(date)
         logger.info("Adding month: %s", month_key)
         self.data.add_month(month_key)
-        self.set_data()
-
-    def _populate_month_select(self):
-        logger.debug("Populating month select")
-        index = (
-            self.ui.month_select.currentIndex()
-            if self.ui.month_select.currentText()
-            else None
-        )
-        self.ui.month_select.clear()
-        for key in self.data.months_available:
-            month_str = key.display
-            self.ui.month_select.addItem(month_str)
-        if index is None:
-            index = 0
-        self.ui.month_select.setCurrentIndex(index)
+        self.month_selector.add(month_key)
 
     def _on_new_static_press(self):
         dialog = StaticWindow(self._add_static)
@@ -126,16 +168,20 @@ class ApplicationWindow(QtWidgets.QMainWindow):
         def try_add_variable(static):
             try:
                 self.data.add_static_to_month(c(), static)
+            except KeyError:
+                logger.exception("No month to add the static line item to")
+                dialog.close()
+                self.error_message("Please select a month first!")
             except ValueError:
                 logger.exception("Unable to add static line item")
                 dialog.close()
-                self._error_message("Cannot add duplicate item name!")
-            self._load_month()
+                self.error_message("Cannot add duplicate item name!")
+            self._refresh_month()
 
         return try_add_variable
 
     @staticmethod
-    def _error_message(message):
+    def error_message(message):
         err = QtWidgets.QErrorMessage()
         err.showMessage(message)
         err.exec()
@@ -151,111 +197,14 @@ class ApplicationWindow(QtWidgets.QMainWindow):
         def try_add_variable(variable):
             try:
                 self.data.add_variable_to_month(c(), variable)
+            except KeyError:
+                logger.exception("No month to add the variable line item to")
+                dialog.close()
+                self.error_message("Please select a month first!")
             except ValueError:
                 logger.exception("Unable to add variable line item")
                 dialog.close()
-                self._error_message("Cannot add duplicate item name!")
-            self._load_month()
+                self.error_message("Cannot add duplicate item name!")
+            self._refresh_month()
 
         return try_add_variable
-
-    def _on_static_cell_change(self, row, column):
-        if column == 1:
-            item_name = self.ui.static_table.item(row, 0).text()
-            updatedValue = self.ui.static_table.item(row, column).text()
-            self.data.update_static(
-                self._current_month, item_name, amount=int(updatedValue)
-            )
-
-    def _on_static_check_state_change(self, item_name):
-        c = lambda: self._current_month
-
-        def change_state(check_state):
-            new_state = bool(check_state)
-            logger.debug("Changing paid for %s to %s", item_name, new_state)
-            self.data.update_static(c(), item_name, paid=new_state)
-
-        return change_state
-
-    def _on_variable_cell_change(self, row, column):
-        if column == 1:
-            item_name = self.ui.variable_table.item(row, 0).text()
-            updated_value = self.ui.variable_table.item(row, column).text()
-            if updated_value:
-                try:
-                    new_val = int(updated_value)
-                    self.data.update_variable(
-                        self._current_month, item_name, amount=new_val
-                    )
-                except ValueError:
-                    logger.exception("Unable to set cell")
-                    item = self.data.get_variable(self._current_month, item_name)
-                    self.ui.variable_table.item(row, column).setText(str(item.amount))
-                    self._error_message("Amount must be an integer!")
-
-
-class StaticTableManager:
-    def __init__(self, static_table, check_callback):
-        self.table = static_table
-        self.check_callback = check_callback
-        self._setup()
-
-    def _setup(self):
-        self.table.setColumnCount(3)
-        self.table.horizontalHeader().setSectionResizeMode(
-            QtWidgets.QHeaderView.Stretch
-        )
-        self.table.setHorizontalHeaderLabels(["Name", "Amount", "Paid"])
-
-    def add_items(self, items: list):
-        self.table.setRowCount(len(items))
-        for i, s in enumerate(items):
-            self._add_item(i, s)
-
-    def _add_item(self, r, item):
-        name = QtWidgets.QTableWidgetItem(item.name)
-        name.setFlags(name.flags() ^ Qt.ItemIsEditable)
-
-        amt = QtWidgets.QTableWidgetItem(str(item.amount))
-        amt.setTextAlignment(Qt.AlignCenter)
-
-        paid = QtWidgets.QCheckBox()
-        paid.setCheckState(item.paid)
-        paid.stateChanged.connect(self.check_callback(item.name))
-        paid = self.create_row_widget(paid)
-
-        self.table.setItem(r, 0, name)
-        self.table.setItem(r, 1, amt)
-        self.table.setCellWidget(r, 2, paid)
-
-    @staticmethod
-    def create_row_widget(inner_widget):
-        w = QtWidgets.QWidget()
-        l = QtWidgets.QHBoxLayout(w)
-        l.addWidget(inner_widget)
-        l.setAlignment(Qt.AlignCenter)
-        w.setLayout(l)
-        return w
-
-
-class VariableTableManager:
-    def __init__(self, variable_table):
-        self.table = variable_table
-        self._setup()
-
-    def _setup(self):
-        self.table.setColumnCount(2)
-        self.table.horizontalHeader().setSectionResizeMode(
-            QtWidgets.QHeaderView.Stretch
-        )
-        self.table.setHorizontalHeaderLabels(["Name", "Amount"])
-
-    def add_items(self, items: list):
-        self.table.setRowCount(len(items))
-        for i, s in enumerate(items):
-            name = QtWidgets.QTableWidgetItem(s.name)
-            name.setFlags(name.flags() ^ Qt.ItemIsEditable)
-            amt = QtWidgets.QTableWidgetItem(str(s.amount))
-            amt.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(i, 0, name)
-            self.table.setItem(i, 1, amt)
@@ -0,0 +1,59 @@
+import logging
+
+from PyQt5 import QtCore
+
+
+logger = logging.getLogger(__name__)
+
+
+class Autosave(QtCore.QObject):
+    """Saves to the last opened file after edits stop.
+
+    Each change restarts a ``quiet_ms`` timer, so a burst of edits leads
+    to a single save; a burst never delays the save by more than
+    ``max_delay_ms``. The save itself runs on a worker via SaveLoad and
+    is skipped when nothing is dirty.
+    """
+
+    quiet_ms = 2000
+    max_delay_ms = 30000
+
+    def __init__(self, app, save_load, parent=None):
+        super(Autosave, self).__init__(parent)
+        self.app = app
+        self.save_load = save_load
+        self.enabled = True
+
+        self._quiet = QtCore.QTimer(self)
+        self._quiet.setSingleShot(True)
+        self._quiet.timeout.connect(self._fire)
+
+        self._deadline = QtCore.QTimer(self)
+        self._deadline.setSingleShot(True)
+        self._deadline.timeout.connect(self._fire)
+
+    def schedule(self, *args):
+        if not self.enabled:
+            return
+        self._quiet.start(self.quiet_ms)
+        if not self._deadline.isActive():
+            self._deadline.start(self.max_delay_ms)
+
+    def flush(self):
+        """Start a scheduled save now rather than when its timer runs out."""
+        if self._quiet.isActive() or self._deadline.isActive():
+            self._fire()
+
+    def _fire(self):
+        self._quiet.stop()
+        self._deadline.stop()
+        data = self.app.data
+        path = self.save_load.last_opened
+        if data is None or not data.dirty or not path:
+            return
+        if self.save_load.busy:
+            # Try again once the running save or load is done
+            self.schedule()
+            return
+        logger.debug("Autosaving to %s", path)
+        self.save_load.save(path)
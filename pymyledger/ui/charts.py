@@ -0,0 +1,295 @@
+import bisect
+import logging
+
+import numpy as np
+from PyQt5 import QtCore, QtGui, QtWidgets
+from PyQt5.QtCore import Qt
+
+from ..analytics import LedgerFrame
+from ..model import Data, MonthKey
+
+
+logger = logging.getLogger(__name__)
+
+
+def minmax_buckets(values, width):
+    """Split ``values`` into at most ``width`` buckets and return each
+    bucket's centre position, minimum and maximum (NaN-aware)."""
+    n = len(values)
+    if n <= width:
+        return np.arange(n, dtype=np.float64), values, values
+    edges = np.linspace(0, n, width + 1).astype(np.intp)
+    starts = edges[:-1]
+    with np.errstate(invalid="ignore"):
+        low = np.fmin.reduceat(values, starts)
+        high = np.fmax.reduceat(values, starts)
+    return (starts + edges[1:] - 1) / 2.0, low, high
+
+
+class TrendChart(QtWidgets.QWidget):
+    """Line chart of monthly series sharing one time axis.
+
+    Each series is reduced to a min/max envelope per horizontal pixel
+    before painting, and the reduced points are cached per series and
+    widget size, so replacing one series only recomputes that series.
+    """
+
+    margin = 8
+
+    def __init__(self, parent=None):
+        super(TrendChart, self).__init__(parent)
+        self.setMinimumHeight(120)
+        self._months = np.empty(0, dtype=np.int64)
+        self._series = {}
+        self._colors = {}
+        self._points = {}
+        self._range = None
+
+    def set_months(self, months):
+        """Ordinals of the months the series' values belong to."""
+        self._months = months
+        self._series.clear()
+        self._points.clear()
+        self._range = None
+        self.update()
+
+    def set_series(self, label, values, color=None):
+        self._series[label] = values
+        if color is not None:
+            self._colors[label] = QtGui.QColor(color)
+        self._points.pop(label, None)
+        self._range = None
+        self.update()
+
+    def clear_series(self):
+        self._series.clear()
+        self._points.clear()
+        self._range = None
+        self.update()
+
+    def resizeEvent(self, event):
+        self._points.clear()
+        super(TrendChart, self).resizeEvent(event)
+
+    def _plot_rect(self):
+        return QtCore.QRectF(self.rect()).adjusted(
+            self.margin, self.margin + 14, -self.margin, -self.margin - 14
+        )
+
+    def _value_range(self):
+        if self._range is None:
+            finite = [v[np.isfinite(v)] for v in self._series.values()]
+            finite = [v for v in finite if v.size]
+            if finite:
+                low = min(0.0, min(float(v.min()) for v in finite))
+                high = max(0.0, max(float(v.max()) for v in finite))
+            else:
+                low, high = 0.0, 1.0
+            self._range = (low, high if high > low else low + 1.0)
+        return self._range
+
+    def _polylines(self, label, rect):
+        """Pixel polylines for ``label``, one per run of known values."""
+        key = (label, self._value_range())
+        cached = self._points.get(label)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        px, py_low, py_high = self._envelope(self._series[label], rect)
+        known = np.isfinite(py_low)
+        lines = []
+        # Contiguous runs of buckets with values become separate polylines
+        breaks = np.flatnonzero(np.diff(known.astype(np.int8))) + 1
+        for run in np.split(np.arange(len(known)), breaks):
+            if run.size == 0 or not known[run[0]]:
+                continue
+            polygon = QtGui.QPolygonF()
+            for i in run:
+                polygon.append(QtCore.QPointF(px[i], py_high[i]))
+                if py_low[i] != py_high[i]:
+                    polygon.append(QtCore.QPointF(px[i], py_low[i]))
+            lines.append(polygon)
+        self._points[label] = (key, lines)
+        return lines
+
+    def _envelope(self, values, rect):
+        """Pixel x and low and high y of each bucket of ``values``; the y
+        are NaN where a bucket has no values."""
+        x, low, high = minmax_buckets(values, max(int(rect.width()), 1))
+        n = max(len(values) - 1, 1)
+        v_low, v_high = self._value_range()
+        scale_y = rect.height() / (v_high - v_low)
+        return (
+            rect.left() + x * rect.width() / n,
+            rect.bottom() - (low - v_low) * scale_y,
+            rect.bottom() - (high - v_low) * scale_y,
+        )
+
+    def paintEvent(self, _event):
+        painter = QtGui.QPainter(self)
+        painter.fillRect(self.rect(), self.palette().base())
+        rect = self._plot_rect()
+        if self._months.size == 0 or rect.width() < 2 or rect.height() < 2:
+            painter.end()
+            return
+        v_low, v_high = self._value_range()
+        painter.setPen(QtGui.QPen(self.palette().mid().color(), 1, Qt.DashLine))
+        zero = rect.bottom() - (0 - v_low) * rect.height() / (v_high - v_low)
+        painter.drawLine(
+            QtCore.QPointF(rect.left(), zero), QtCore.QPointF(rect.right(), zero)
+        )
+
+        # A downsampled envelope is already one point pair per pixel column;
+        # antialiasing or a wide pen only costs time
+        smooth = len(self._months) <= rect.width()
+        painter.setRenderHint(QtGui.QPainter.Antialiasing, smooth)
+        legend_x = rect.left()
+        for label in self._series:
+            color = self._colors.get(label, self.palette().text().color())
+            painter.setPen(QtGui.QPen(color, 1.5 if smooth else 1))
+            for polyline in self._polylines(label, rect):
+                if polyline.size() == 1:
+                    painter.drawPoint(polyline.at(0))
+                else:
+                    painter.drawPolyline(polyline)
+            painter.drawText(QtCore.QPointF(legend_x, self.margin + 10), label)
+            legend_x += painter.fontMetrics().horizontalAdvance(label) + 16
+        self._paint_axes(painter, rect, v_high)
+        painter.end()
+
+    def _paint_axes(self, painter, rect, v_high):
+        painter.setPen(self.palette().text().color())
+        first = MonthKey.from_ordinal(int(self._months[0])).display
+        last = MonthKey.from_ordinal(int(self._months[-1])).display
+        baseline = self.height() - self.margin
+        painter.drawText(QtCore.QPointF(rect.left(), baseline), first)
+        painter.drawText(
+            QtCore.QPointF(
+                rect.right() - painter.fontMetrics().horizontalAdvance(last), baseline
+            ),
+            last,
+        )
+        high = "%g" % v_high
+        painter.drawText(
+            QtCore.QPointF(
+                rect.right() - painter.fontMetrics().horizontalAdvance(high),
+                self.margin + 10,
+            ),
+            high,
+        )
+
+
+class ChartsPanel(QtWidgets.QDockWidget):  # pylint: disable=R0902
+    """Monthly assets, liabilities and balance, and one item's history.
+
+    Series are computed column-wise from a LedgerFrame the first time the
+    panel is shown. After that an edit only patches the edited month's
+    values; adding a month rebuilds the frame.
+    """
+
+    def __init__(self, parent=None):
+        super(ChartsPanel, self).__init__("Trends", parent)
+        self.setObjectName("charts")
+        self.data: Data = None
+        self._frame: LedgerFrame = None
+        self._ordinals = []
+        self._patched = set()
+        self._assets = np.empty(0)
+        self._liabilities = np.empty(0)
+        self._item = np.empty(0)
+
+        body = QtWidgets.QWidget(self)
+        layout = QtWidgets.QVBoxLayout(body)
+        self.totals_chart = TrendChart(body)
+        layout.addWidget(self.totals_chart)
+        row = QtWidgets.QHBoxLayout()
+        row.addWidget(QtWidgets.QLabel("Item:", body))
+        self.item_select = QtWidgets.QComboBox(body)
+        self.item_select.currentTextChanged.connect(self._show_item)
+        row.addWidget(self.item_select, 1)
+        layout.addLayout(row)
+        self.item_chart = TrendChart(body)
+        layout.addWidget(self.item_chart)
+        self.setWidget(body)
+
+    def set_data(self, data: Data):
+        if self.data is not None:
+            self.data.remove_listener(self.month_changed)
+        self.data = data
+        self._frame = None
+        if data is not None:
+            data.add_listener(self.month_changed)
+        if self.isVisible():
+            self._rebuild()
+
+    def showEvent(self, event):
+        if self._frame is None and self.data is not None:
+            self._rebuild()
+        super(ChartsPanel, self).showEvent(event)
+
+    def month_changed(self, month: MonthKey):
+        if self._frame is None:
+            return
+        if not self.isVisible():
+            # Rebuilt when next shown
+            self._frame = None
+            return
+        i = bisect.bisect_left(self._ordinals, month.ordinal)
+        if i == len(self._ordinals) or self._ordinals[i] != month.ordinal:
+            self._rebuild()
+            return
+        budget = self.data.ledger.months[month]
+        self._assets[i] = budget.assets
+        self._liabilities[i] = budget.liabilities
+        self._patched.add(i)
+        self._show_totals()
+        name = self.item_select.currentText()
+        if name:
+            self._item[i] = self._item_amount(budget, name)
+            self.item_chart.set_series(name, self._item)
+
+    def _rebuild(self):
+        logger.debug("Building trend series")
+        frame = self._frame = LedgerFrame.from_ledger(self.data.ledger)
+        self._ordinals = frame.months.tolist()
+        self._patched = set()
+        self._assets = frame.assets_by_month()
+        self._liabilities = frame.liabilities_by_month()
+        self.totals_chart.set_months(frame.months)
+        self.item_chart.set_months(frame.months)
+        self._show_totals()
+        current = self.item_select.currentText()
+        names = sorted(frame.totals_by_item())
+        blocker = QtCore.QSignalBlocker(self.item_select)
+        self.item_select.clear()
+        self.item_select.addItems(names)
+        if current in names:
+            self.item_select.setCurrentText(current)
+        blocker.unblock()
+        self._show_item(self.item_select.currentText())
+
+    def _show_totals(self):
+        chart = self.totals_chart
+        chart.set_series("Assets", self._assets, Qt.darkGreen)
+        chart.set_series("Liabilities", self._liabilities, Qt.darkRed)
+        chart.set_series("Balance", self._assets - self._liabilities, Qt.darkBlue)
+
+    def _show_item(self, name):
+        self.item_chart.clear_series()
+        if not name or self._frame is None:
+            return
+        self._item = self._frame.item_history(name)
+        # The frame predates edits made since it was built
+        months = self.data.ledger.months
+        for i in self._patched:
+            budget = months[MonthKey.from_ordinal(self._ordinals[i])]
+            self._item[i] = self._item_amount(budget, name)
+        self.item_chart.set_series(name, self._item, Qt.darkMagenta)
+
+    @staticmethod
+    def _item_amount(budget, name):
+        amounts = [
+            item.amount
+            for item in (budget.static.get(name), budget.variable.get(name))
+            if item is not None
+        ]
+        return sum(amounts) if amounts else np.nan
@@ -23,10 +23,8 @@ class Ui_PyLedger(object):
         self.grid = QtWidgets.QGridLayout(self.gridLayoutWidget)
         self.grid.setContentsMargins(0, 0, 0, 0)
         self.grid.setObjectName("grid")
-        self.static_table = QtWidgets.QTableWidget(self.gridLayoutWidget)
+        self.static_table = QtWidgets.QTableView(self.gridLayoutWidget)
         self.static_table.setObjectName("static_table")
-        self.static_table.setColumnCount(0)
-        self.static_table.setRowCount(0)
         self.grid.addWidget(self.static_table, 6, 0, 1, 1)
         self.add_static = QtWidgets.QPushButton(self.gridLayoutWidget)
         self.add_static.setObjectName("add_static")
@@ -51,10 +49,8 @@ class Ui_PyLedger(object):
         self.add_variable = QtWidgets.QPushButton(self.gridLayoutWidget)
         self.add_variable.setObjectName("add_variable")
         self.grid.addWidget(self.add_variable, 7, 2, 1, 1, QtCore.Qt.AlignHCenter)
-        self.variable_table = QtWidgets.QTableWidget(self.gridLayoutWidget)
+        self.variable_table = QtWidgets.QTableView(self.gridLayoutWidget)
         self.variable_table.setObjectName("variable_table")
-        self.variable_table.setColumnCount(0)
-        self.variable_table.setRowCount(0)
         self.grid.addWidget(self.variable_table, 6, 2, 1, 1)
         self.gridLayoutWidget_2 = QtWidgets.QWidget(self.main_widget)
         self.gridLayoutWidget_2.setGeometry(QtCore.QRect(310, 470, 151, 85))
@@ -0,0 +1,80 @@
+import bisect
+import logging
+from typing import Iterable
+
+from PyQt5 import QtCore, QtWidgets
+
+from ..model import MonthKey
+
+
+logger = logging.getLogger(__name__)
+
+
+class MonthSelector(QtCore.QObject):
+    """Lists months newest first in a combo box, each item carrying its
+    MonthKey as item data.
+
+    ``changed`` is emitted with the selected MonthKey (or None) whenever
+    the selection moves to another month, and only then.
+    """
+
+    changed = QtCore.pyqtSignal(object)
+
+    def __init__(self, combo: QtWidgets.QComboBox, parent=None):
+        super(MonthSelector, self).__init__(parent)
+        self.combo = combo
+        # Negated ordinals, ascending like the combo's newest-first order
+        self._keys = []
+        self._current = None
+        combo.currentIndexChanged.connect(self._on_index_change)
+
+    @property
+    def current(self) -> MonthKey:
+        return self._current
+
+    def set_months(self, months: Iterable[MonthKey], select: MonthKey = None):
+        """Replace the listed months, keeping ``select`` selected if it is
+        among them and the newest month otherwise."""
+        months = sorted(months, reverse=True)
+        blocker = QtCore.QSignalBlocker(self.combo)
+        self.combo.clear()
+        for month in months:
+            self.combo.addItem(month.display, month)
+        self._keys = [-m.ordinal for m in months]
+        blocker.unblock()
+        if select is None or self.index_of(select) is None:
+            select = months[0] if months else None
+        self.select(select)
+
+    def add(self, month: MonthKey):
+        """List ``month`` at its sorted position; the selection stays."""
+        if self.index_of(month) is not None:
+            return
+        i = bisect.bisect_left(self._keys, -month.ordinal)
+        blocker = QtCore.QSignalBlocker(self.combo)
+        self.combo.insertItem(i, month.display, month)
+        blocker.unblock()
+        self._keys.insert(i, -month.ordinal)
+        if self._current is None:
+            self.select(month)
+
+    def index_of(self, month: MonthKey):
+        i = bisect.bisect_left(self._keys, -month.ordinal)
+        if i < len(self._keys) and self._keys[i] == -month.ordinal:
+            return i
+        return None
+
+    def select(self, month: MonthKey):
+        i = -1 if month is None else self.index_of(month)
+        if i is None:
+            raise KeyError(month)
+        self.combo.setCurrentIndex(i)
+        # An unchanged index emits nothing, but the list may have been rebuilt
+        self._on_index_change(i)
+
+    def _on_index_change(self, index):
+        month = self.combo.itemData(index) if index >= 0 else None
+        if month != self._current:
+            logger.debug("Selected month %s", month)
+            self._current = month
+            self.changed.emit(month)
@@ -1,14 +1,37 @@
 import logging
+import os
 from pathlib import Path
 
 from PyQt5 import QtWidgets
 
-from ..serialize import Serializer
+from ..convert import version_of
+from ..serialize import Serializer, SqliteStore
+from .tasks import Task
 
 
 logger = logging.getLogger(__name__)
 
 
+def save_ledger(fp, snapshot, version=None, progress=None):
+    if progress:
+        progress("Saving %s..." % fp)
+    return Serializer(fp).save(snapshot, version)
+
+
+def save_version(fp):
+    """The version an existing ledger file is kept in; None for new files
+    and databases."""
+    if SqliteStore.handles(fp) or not os.path.exists(fp):
+        return None
+    return version_of(fp)
+
+
+def load_ledger(fp, progress=None):
+    if progress:
+        progress("Loading %s..." % fp)
+    return Serializer(fp).load(lazy=True)
+
+
 class SaveLoad(QtWidgets.QWidget):
     def __init__(self, app, save_func, parent=None):
         super(SaveLoad, self).__init__(parent)
@@ -17,35 +40,99 @@ class SaveLoad(QtWidgets.QWidget):
         self.app.ui.save_button.clicked.connect(self._on_save_press)
         self.app.ui.load_button.clicked.connect(self._on_load_press)
         self.last_opened = None
+        self._busy = False
+        self._task = None
 
     def _on_save_press(self):
         logger.debug("Opening save dialog")
         homedir = str(Path.home())
         (path, _) = QtWidgets.QFileDialog.getSaveFileName(
-            self, "Save to file", homedir, "PyMyLedger files (*.pml)"
+            self, "Save to file", homedir, "PyMyLedger files (*.pml *.pmldb)"
         )
         if path:
-            try:
-                logger.info("Got save path %s", path)
-                self.save_func(path, self.app.data)
-                self.last_opened = path
-            except Exception:
-                logger.exception("Unable to save data!")
-                raise
+            logger.info("Got save path %s", path)
+            self.save(path)
+
+    def save(self, path, on_done=None):
+        """Save on a worker thread; edits can continue meanwhile."""
+        if self._busy:
+            logger.info("Save or load already running, skipping save")
+            return False
+        data = self.app.data
+        version = save_version(path)
+        snapshot = data.snapshot(
+            Serializer.latest_version() if version is None else version
+        )
+
+        def saved(stats):
+            data.snapshot_saved(snapshot)
+            self.last_opened = path
+            self._finish("Saved %s (%d bytes)" % (path, stats.bytes_written))
+            if on_done:
+                on_done()
+
+        def failed(message):
+            data.snapshot_failed(snapshot)
+            self._finish("Unable to save %s" % path)
+            self.app.error_message("Unable to save data: %s" % message)
+
+        self._run(Task(self.save_func, path, snapshot, version), saved, failed)
+        return True
 
     def _on_load_press(self):
         logger.debug("Opening load dialog")
         homedir = str(Path.home())
         (path, _) = QtWidgets.QFileDialog.getOpenFileName(
-            self, "Save to file", homedir, "PyMyLedger files (*.pml)"
+            self, "Save to file", homedir, "PyMyLedger files (*.pml *.pmldb)"
         )
         if path:
-            try:
-                logger.info("Got load path %s", path)
-                data = Serializer(path).load()
-                logger.debug("Loaded data: %s", data)
-                self.last_opened = path
-            except Exception:
-                logger.exception("Unable to load data!")
-                raise
+            logger.info("Got load path %s", path)
+            self.load(path)
+
+    def load(self, path, on_failed=None):
+        """Load on a worker thread and show the result when it arrives.
+
+        ``on_failed`` replaces the error dialog if given.
+        """
+        if self._busy:
+            logger.info("Save or load already running, skipping load")
+            return False
+
+        def loaded(data):
+            logger.debug("Loaded data: %s", data)
+            self.last_opened = path
+            self._finish("Loaded %s" % path)
             self.app.set_data(data)
+
+        def failed(message):
+            self._finish("Unable to load %s" % path)
+            if on_failed:
+                on_failed(message)
+            else:
+                self.app.error_message("Unable to load data: %s" % message)
+
+        self._run(Task(load_ledger, path), loaded, failed)
+        return True
+
+    @property
+    def busy(self):
+        return self._busy
+
+    def _run(self, task, on_finished, on_failed):
+        self._busy = True
+        self.app.ui.save_button.setEnabled(False)
+        self.app.ui.load_button.setEnabled(False)
+        task.signals.progress.connect(self.app.statusBar().showMessage)
+        task.signals.finished.connect(on_finished)
+        task.signals.failed.connect(on_failed)
+        # Keep the signals object alive until the task has reported back
+        self._task = task
+        task.start()
+
+    def _finish(self, message):
+        self._busy = False
+        self._task = None
+        self._task = None
+        self.app.ui.save_button.setEnabled(True)
+        self.app.ui.load_button.setEnabled(True)
+        self.app.statusBar().showMessage(message, 5000)
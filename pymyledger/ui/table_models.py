@@ -0,0 +1,208 @@
+import logging
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import Qt
+
+from ..model import Data, MonthKey
+
+
+logger = logging.getLogger(__name__)
+
+
+def _runs(rows):
+    """Consecutive runs in ascending ``rows`` as (first, last) pairs."""
+    first = last = None
+    for row in rows:
+        if last is not None and row == last + 1:
+            last = row
+            continue
+        if first is not None:
+            yield first, last
+        first = last = row
+    if first is not None:
+        yield first, last
+
+
+class LineItemsModel(QtCore.QAbstractTableModel):
+    """One month's static or variable items, read straight from the
+    ledger. Edits are made through ``Data``.
+
+    The budget is looked up on every access rather than held, since a lazy
+    ledger may evict and reload a month while it is displayed. The rows
+    last shown are kept so ``refresh`` can signal only what changed.
+    """
+
+    NAME, AMOUNT, PAID = range(3)
+    headers = ("Name", "Amount")
+
+    # Only for edits made in the view, never for refreshes
+    edited = QtCore.pyqtSignal()
+    edit_failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super(LineItemsModel, self).__init__(parent)
+        self._data: Data = None
+        self._month: MonthKey = None
+        self._shown = ([], [], bytearray())
+
+    def set_month(self, data: Data, month: MonthKey):
+        if data is self._data and month == self._month:
+            self.refresh()
+            return
+        self.beginResetModel()
+        self._data = data
+        self._month = month
+        self._shown = self._snapshot()
+        self.endResetModel()
+
+    def refresh(self):
+        """Signal the rows added, removed or changed since last shown."""
+        names, amounts, paid = shown = self._snapshot()
+        old_names, old_amounts, old_paid = self._shown
+        common = min(len(names), len(old_names))
+        if names[:common] != old_names[:common]:
+            self.beginResetModel()
+            self._shown = shown
+            self.endResetModel()
+            return
+        if len(names) < len(old_names):
+            self.beginRemoveRows(QtCore.QModelIndex(), len(names), len(old_names) - 1)
+            self._shown = shown
+            self.endRemoveRows()
+        elif len(names) > len(old_names):
+            self.beginInsertRows(QtCore.QModelIndex(), len(old_names), len(names) - 1)
+            self._shown = shown
+            self.endInsertRows()
+        else:
+            self._shown = shown
+        same_amounts = amounts[:common] == old_amounts[:common]
+        if same_amounts and paid[:common] == old_paid[:common]:
+            return
+        changed = (
+            i
+            for i in range(common)
+            if amounts[i] != old_amounts[i] or paid[i] != old_paid[i]
+        )
+        last_column = self.columnCount() - 1
+        for first, last in _runs(changed):
+            self.dataChanged.emit(self.index(first, 0), self.index(last, last_column))
+
+    def _snapshot(self):
+        items = self.items()
+        if not items:
+            return [], [], bytearray()
+        return list(items.names()), list(items.amounts()), bytearray(items.paid_flags())
+
+    def _edited(self, index):
+        row = index.row()
+        item = self.items()[row]
+        _, amounts, paid = self._shown
+        amounts[row] = item.amount
+        paid[row] = bool(getattr(item, "paid", False))
+        self.dataChanged.emit(index, index)
+        self.edited.emit()
+
+    def items(self):
+        if self._data is None or self._month is None:
+            return ()
+        budget = self._data.ledger.months.get(self._month)
+        return () if budget is None else self._items_of(budget)
+
+    @staticmethod
+    def _items_of(budget):
+        raise NotImplementedError
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._shown[0])
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.headers[section]
+        return super(LineItemsModel, self).headerData(section, orientation, role)
+
+    def flags(self, index):
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == self.AMOUNT:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        items = self.items()
+        if not index.isValid() or index.row() >= len(items):
+            return None
+        item = items[index.row()]
+        column = index.column()
+        if column == self.NAME:
+            if role == Qt.DisplayRole:
+                return item.name
+        elif column == self.AMOUNT:
+            if role in (Qt.DisplayRole, Qt.EditRole):
+                return str(item.amount)
+            if role == Qt.TextAlignmentRole:
+                return Qt.AlignCenter
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or index.column() != self.AMOUNT or role != Qt.EditRole:
+            return False
+        try:
+            amount = int(value)
+        except ValueError:
+            logger.exception("Unable to set amount")
+            self.edit_failed.emit("Amount must be an integer!")
+            return False
+        self._update(self.items()[index.row()].name, amount=amount)
+        self._edited(index)
+        return True
+
+    def _update(self, name, amount=None, paid=None):
+        raise NotImplementedError
+
+
+class StaticItemsModel(LineItemsModel):
+    headers = ("Name", "Amount", "Paid")
+
+    @staticmethod
+    def _items_of(budget):
+        return budget.static
+
+    def flags(self, index):
+        flags = super(StaticItemsModel, self).flags(index)
+        if index.column() == self.PAID:
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and index.column() == self.PAID:
+            if role == Qt.CheckStateRole:
+                paid = self.items()[index.row()].paid
+                return Qt.Checked if paid else Qt.Unchecked
+            return None
+        return super(StaticItemsModel, self).data(index, role)
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if index.isValid() and index.column() == self.PAID:
+            if role != Qt.CheckStateRole:
+                return False
+            name = self.items()[index.row()].name
+            paid = value == Qt.Checked
+            logger.debug("Changing paid for %s to %s", name, paid)
+            self._update(name, paid=paid)
+            self._edited(index)
+            return True
+        return super(StaticItemsModel, self).setData(index, value, role)
+
+    def _update(self, name, amount=None, paid=None):
+        self._data.update_static(self._month, name, amount=amount, paid=paid)
+
+
+class VariableItemsModel(LineItemsModel):
+    @staticmethod
+    def _items_of(budget):
+        return budget.variable
+
+    def _update(self, name, amount=None, paid=None):
+        self._data.update_variable(self._month, name, amount=amount)
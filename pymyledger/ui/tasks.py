@@ -0,0 +1,42 @@
+import logging
+
+from PyQt5 import QtCore
+
+
+logger = logging.getLogger(__name__)
+
+
+class TaskSignals(QtCore.QObject):
+    progress = QtCore.pyqtSignal(str)
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+
+
+class Task(QtCore.QRunnable):
+    """Runs ``fn(*args, progress=...)`` on the global thread pool.
+
+    Signals are delivered on the thread that created the task, so slots
+    connected from the GUI may touch widgets.
+    """
+
+    def __init__(self, fn, *args):
+        super(Task, self).__init__()
+        self.fn = fn
+        self.args = args
+        self.signals = TaskSignals()
+
+    def start(self):
+        QtCore.QThreadPool.globalInstance().start(self)
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, progress=self.signals.progress.emit)
+        except Exception as e:
+            logger.exception("Background task failed")
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+    @staticmethod
+    def wait_for_all():
+        QtCore.QThreadPool.globalInstance().waitForDone()
@@ -0,0 +1,42 @@
+import pytest
+
+from pymyledger.analytics import LedgerFrame
+from pymyledger.model import (
+    Data,
+    Ledger,
+    MonthBudget,
+    MonthKey,
+    StaticLineItem,
+    VariableLineItem,
+)
+from pymyledger.serialize import Serializer
+
+
+def make_data():
+    months = {}
+    for i in range(48):
+        # Item lists of different lengths, so mixed up ids would misalign
+        months[MonthKey(2016 + i // 12, i % 12 + 1)] = MonthBudget(
+            [StaticLineItem("S%d" % j, 10 * j + i) for j in range(1 + i % 5)],
+            [VariableLineItem("V%d" % (i % 3), -i)],
+        )
+    return Data(Ledger(months=months))
+
+
+@pytest.mark.parametrize("name", ["a.pml", "a.pmldb"])
+def test_frame_of_lazy_ledger_larger_than_its_cache(tmp_path, name):
+    path = str(tmp_path / name)
+    expected = make_data()
+    Serializer(path).save(expected)
+    data = Serializer(path).load(lazy=True, cache_size=2)
+
+    frame = LedgerFrame.from_ledger(data.ledger)
+    assert len(frame.name_id) == len(frame.amount)
+    totals = frame.totals_by_item()
+    for name in ("S0", "S4", "V1"):
+        series = expected.item_series(name)
+        assert totals[name] == pytest.approx(sum(series.amounts))
+    months = expected.ledger.sorted_months
+    assert list(frame.assets_by_month()) == pytest.approx(
+        [expected.ledger.months[m].assets for m in months]
+    )
@@ -0,0 +1,44 @@
+from pymyledger import cli
+from pymyledger.model import (
+    Data,
+    Ledger,
+    MonthBudget,
+    MonthKey,
+    StaticLineItem,
+    VariableLineItem,
+)
+from pymyledger.serialize import Serializer
+
+
+def make_file(tmp_path, version):
+    path = str(tmp_path / "ledger.pml")
+    budget = MonthBudget(
+        [StaticLineItem("Rent", -1200, True)], [VariableLineItem("Food", -80)]
+    )
+    Serializer(path).save(Data(Ledger({MonthKey(2019, 6): budget})), version)
+    return path
+
+
+def test_set_zero(tmp_path):
+    path = make_file(tmp_path, 1)
+    assert cli.main(["set", path, "2019-06", "Rent", "0"]) == 0
+    assert cli.main(["set", path, "Jun 2019", "Food", "0"]) == 0
+    data = Serializer(path).load()
+    assert data.get_static(MonthKey(2019, 6), "Rent").amount == 0
+    assert data.get_variable(MonthKey(2019, 6), "Food").amount == 0
+
+
+def test_set_keeps_the_file_version(tmp_path):
+    path = make_file(tmp_path, 0)
+    assert cli.main(["set", path, "2019-06", "Rent", "-1300", "--unpaid"]) == 0
+    with open(path, "rb") as f:
+        assert Serializer.version_of(f.read()) == 0
+    rent = Serializer(path).load().get_static(MonthKey(2019, 6), "Rent")
+    assert (rent.amount, rent.paid) == (-1300, False)
+
+
+def test_missing_file(tmp_path, capsys):
+    path = tmp_path / "missing.pmldb"
+    assert cli.main(["summary", str(path)]) == 1
+    assert "No such file" in capsys.readouterr().err
+    assert not path.exists()
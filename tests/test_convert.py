@@ -0,0 +1,21 @@
+import pytest
+
+from pymyledger.convert import convert_file, version_of
+from pymyledger.serialize import Serializer
+
+from .test_serialize import make_data
+
+
+@pytest.mark.parametrize(
+    "source, target", [(0, 1), (1, 0), (0, 2), (2, 0), (1, 2), (2, 1)]
+)
+def test_streamed_conversion_matches_a_regular_save(tmp_path, source, target):
+    src = str(tmp_path / "src.pml")
+    Serializer(src).save(make_data(), version=source)
+    streamed = convert_file(src, str(tmp_path / "streamed.pml"), target)
+
+    saved = str(tmp_path / "saved.pml")
+    Serializer(saved).save(Serializer(src).load(), version=target)
+    assert version_of(streamed) == target
+    with open(streamed, "rb") as a, open(saved, "rb") as b:
+        assert a.read() == b.read()
@@ -0,0 +1,17 @@
+import pytest
+
+from pymyledger.model import MonthKey
+
+
+@pytest.mark.parametrize("year, month", [(2020, 13), (2021, 0), (2020, -1)])
+def test_month_key_rejects_out_of_range_months(year, month):
+    # Interned neighbours must not make an invalid month resolve to them
+    MonthKey(year + 1, 1)
+    MonthKey(year - 1, 12)
+    with pytest.raises(ValueError):
+        MonthKey(year, month)
+
+
+def test_month_keys_are_interned():
+    assert MonthKey(2020, 5) is MonthKey(2020, 5)
+    assert MonthKey.from_ordinal(MonthKey(2020, 12).ordinal) is MonthKey(2020, 12)
@@ -0,0 +1,231 @@
+import json
+import mmap
+
+import pytest
+
+from pymyledger.model import (
+    Data,
+    LazyMonths,
+    Ledger,
+    MonthBudget,
+    MonthKey,
+    StaticLineItem,
+    VariableLineItem,
+)
+from pymyledger.serialize import Serializer
+
+
+def make_data():
+    months = {}
+    for i in range(30):
+        month = MonthKey(2018 + i // 12, i % 12 + 1)
+        months[month] = MonthBudget(
+            [
+                StaticLineItem("Rent", -1200, i % 2 == 0),
+                StaticLineItem("Salary", 3000 + i, True),
+                StaticLineItem("Café ☕", -3.75, False),
+                StaticLineItem("Gym", -30.0, i % 3 == 0),
+            ],
+            [
+                VariableLineItem("Groceries", -250 - i),
+                VariableLineItem('Żabka "quoted" \\ name', 12.5),
+                VariableLineItem("Refund", 40.0),
+            ],
+        )
+    return Data(Ledger(months=months))
+
+
+def write_v0(path, data):
+    Serializer(str(path)).save(data, version=0)
+    return json.loads(path.read_text("utf-8"))
+
+
+def assert_same_ledger(actual: Data, expected: Data):
+    assert set(actual.ledger.months) == set(expected.ledger.months)
+    for month in expected.ledger.sorted_months:
+        got = actual.ledger.months[month]
+        want = expected.ledger.months[month]
+        assert list(got.static) == list(want.static), month
+        assert list(got.variable) == list(want.variable), month
+        assert actual.assets_and_liabilities(month) == pytest.approx(
+            expected.assets_and_liabilities(month)
+        )
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_v0_v1_v0_round_trip(tmp_path, lazy):
+    original = make_data()
+    v0_doc = write_v0(tmp_path / "a.pml", original)
+
+    v1 = tmp_path / "b.pml"
+    Serializer(str(v1)).save(Serializer(str(tmp_path / "a.pml")).load(), version=1)
+    assert Serializer.version_of(v1.read_bytes()) == 1
+
+    loaded = Serializer(str(v1)).load(lazy=lazy)
+    assert_same_ledger(loaded, original)
+    assert write_v0(tmp_path / "c.pml", loaded) == v0_doc
+
+
+def test_v1_is_smaller_than_v0(tmp_path):
+    data = make_data()
+    v0 = tmp_path / "a.pml"
+    v1 = tmp_path / "b.pml"
+    Serializer(str(v0)).save(data, version=0)
+    Serializer(str(v1)).save(data, version=1)
+    assert v1.stat().st_size < v0.stat().st_size
+
+
+def test_unicode_names_survive(tmp_path):
+    path = tmp_path / "a.pml"
+    Serializer(str(path)).save(make_data(), version=1)
+    data = Serializer(str(path)).load(lazy=True)
+    month = MonthKey(2019, 6)
+    assert data.get_static(month, "Café ☕").amount == -3.75
+    assert data.get_variable(month, 'Żabka "quoted" \\ name').amount == 12.5
+
+
+def test_whole_number_floats_stay_floats(tmp_path):
+    path = tmp_path / "a.pml"
+    Serializer(str(path)).save(make_data(), version=1)
+    data = Serializer(str(path)).load()
+    month = MonthKey(2018, 1)
+    gym = data.get_static(month, "Gym").amount
+    assert gym == -30.0 and isinstance(gym, float)
+    assert isinstance(data.get_variable(month, "Refund").amount, float)
+
+
+@pytest.mark.parametrize("version", [0, 1])
+def test_whole_number_float_edits(tmp_path, version):
+    path = tmp_path / "a.pml"
+    data = make_data()
+    data.ledger.pack()
+    Serializer(str(path)).save(data, version=version)
+
+    data = Serializer(str(path)).load(lazy=True)
+    last = data.ledger.sorted_months[-1]
+    new = last.next
+    data.add_month(new)
+    data.update_static(new, "Rent", amount=-1250.0)
+    data.update_variable(new, "Groceries", amount=200.0)
+    assert data.assets_and_liabilities(new) == (3029 + 200.0, 1250.0 + 3.75 + 30.0)
+
+    Serializer(str(path)).save(data, version=version)
+    reloaded = Serializer(str(path)).load()
+    assert reloaded.get_static(new, "Rent").amount == -1250.0
+    assert reloaded.get_variable(new, "Groceries").amount == 200.0
+
+
+def test_pack_whole_number_floats():
+    budget = MonthBudget([StaticLineItem("x", 3.0), StaticLineItem("y", 2)])
+    budget.pack()
+    assert list(budget.static.amounts()) == [3.0, 2.0]
+    assert budget.assets == 5
+
+
+@pytest.fixture
+def mapped(monkeypatch):
+    """The files memory-mapped while the test runs."""
+    files = []
+    real_mmap = mmap.mmap
+
+    def spy(fileno, *args, **kwargs):
+        files.append(fileno)
+        return real_mmap(fileno, *args, **kwargs)
+
+    monkeypatch.setattr(mmap, "mmap", spy)
+    return files
+
+
+def test_lazy_load_maps_binary_files(tmp_path, mapped):
+    path = tmp_path / "a.pml"
+    original = make_data()
+    Serializer(str(path)).save(original, version=1)
+
+    data = Serializer(str(path)).load(lazy=True, cache_size=4)
+    months = data.ledger.months
+    assert isinstance(months, LazyMonths)
+    assert len(mapped) == 1
+    assert months.resident == 0
+
+    assert_same_ledger(data, original)
+    assert months.resident <= 4
+
+
+@pytest.mark.parametrize("version", [1, 2])
+def test_lazy_load_reads_binary_files_on_windows(
+    tmp_path, monkeypatch, mapped, version
+):
+    # Replacing a mapped file fails there, so in-place saves need no mapping
+    monkeypatch.setattr("sys.platform", "win32")
+    path = tmp_path / "a.pml"
+    original = make_data()
+    Serializer(str(path)).save(original, version=version)
+
+    data = Serializer(str(path)).load(lazy=True, cache_size=4)
+    assert not mapped
+    month = MonthKey(2019, 6)
+    data.update_static(month, "Rent", amount=-1300)
+    Serializer(str(path)).save(data, version=version)
+
+    reloaded = Serializer(str(path)).load()
+    assert reloaded.get_static(month, "Rent").amount == -1300
+    assert reloaded.get_static(MonthKey(2018, 1), "Rent").amount == -1200
+
+
+@pytest.mark.parametrize("version", [0, 1, 2])
+def test_lazy_saves_keep_no_clean_fragments(tmp_path, version):
+    path = tmp_path / "a.pml"
+    Serializer(str(path)).save(make_data(), version=version)
+    data = Serializer(str(path)).load(lazy=True, cache_size=4)
+    month = MonthKey(2019, 6)
+    data.update_static(month, "Rent", amount=-1300)
+
+    snapshot = data.snapshot(version)
+    stats = Serializer(str(path)).save(snapshot, version=version)
+    data.snapshot_saved(snapshot)
+    assert stats.months_encoded == 1
+    assert not list(data.cached_fragments())
+    assert not list(snapshot.cached_fragments())
+    assert data.ledger.months.resident <= 4
+
+    stats = Serializer(str(path)).save(data, version=version)
+    assert stats.months_encoded == 0
+    assert not list(data.cached_fragments())
+    reloaded = Serializer(str(path)).load()
+    assert reloaded.get_static(month, "Rent").amount == -1300
+    assert_same_ledger(Serializer(str(path)).load(lazy=True), reloaded)
+
+
+def save_in_background(data, path, version):
+    # What SaveLoad does: save a snapshot, then hand the result back
+    snapshot = data.snapshot(version)
+    stats = Serializer(str(path)).save(snapshot, version=version)
+    data.snapshot_saved(snapshot)
+    return stats
+
+
+def test_v0_save_as_v1_then_save_again(tmp_path):
+    original = make_data()
+    # Names the live ledger and the saving snapshot meet in another order
+    for i, month in enumerate(original.ledger.sorted_months):
+        original.add_variable_to_month(month, VariableLineItem("Extra %d" % i, i))
+    v0 = tmp_path / "a.pml"
+    Serializer(str(v0)).save(original, version=0)
+    data = Serializer(str(v0)).load(lazy=True, cache_size=4)
+    data.update_static(MonthKey(2019, 6), "Salary", amount=1)
+    data.update_static(MonthKey(2018, 3), "Rent", amount=-1250)
+
+    v1 = tmp_path / "b.pml"
+    save_in_background(data, v1, 1)
+    data.update_static(MonthKey(2019, 6), "Rent", amount=-1300)
+    data.add_static_to_month(MonthKey(2019, 6), StaticLineItem("New item", 5))
+    stats = save_in_background(data, v1, 1)
+    assert stats.months_reused == 29
+
+    reloaded = Serializer(str(v1)).load()
+    assert reloaded.get_static(MonthKey(2018, 3), "Rent").amount == -1250
+    assert reloaded.get_static(MonthKey(2019, 6), "Rent").amount == -1300
+    assert reloaded.get_static(MonthKey(2019, 6), "New item").amount == 5
+    for month in original.ledger.sorted_months:
+        if month not in (MonthKey(2018, 3), MonthKey(2019, 6)):
+            assert reloaded.ledger.months[month] == original.ledger.months[month]